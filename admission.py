@@ -0,0 +1,155 @@
+"""
+Admission Control Module - Per-priority concurrency limits and load shedding
+Keeps circulation (borrow/return) traffic flowing when browsing spikes by
+giving each class of blueprint its own concurrency limit and wait queue
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import g, jsonify, make_response, request
+
+# Priority classes: concurrent requests, queued requests, and longest queue wait (seconds)
+PRIORITY_CLASSES = {
+    'circulation': {'limit': 16, 'max_queue': 64, 'max_wait': 5.0},
+    'api': {'limit': 8, 'max_queue': 16, 'max_wait': 1.0},
+    'browse': {'limit': 4, 'max_queue': 8, 'max_wait': 0.5},
+    # Long-poll/SSE clients hold a slot for as long as they wait; refuse at once when full
+    'changes': {'limit': 32, 'max_queue': 0, 'max_wait': 0.0},
+}
+
+# Blueprint name -> priority class; requests outside these blueprints are not limited
+BLUEPRINT_CLASSES = {
+    'borrowing': 'circulation',
+    'api': 'api',
+    'async_api': 'api',
+    'catalog': 'browse',
+    'search': 'browse',
+}
+
+# Endpoints with their own class, overriding their blueprint's
+ENDPOINT_CLASSES = {
+    'api.catalog_changes_api': 'changes',
+    'api.catalog_changes_stream': 'changes',
+}
+
+# Endpoints that must stay reachable while shedding
+EXEMPT_ENDPOINTS = {'api.metrics_api'}
+
+# Seconds shed clients are asked to wait before retrying
+RETRY_AFTER_SECONDS = 1
+
+class PriorityClass:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def acquire(self) -> bool:
+        """Take a slot, queueing up to max_wait; False means the request should be shed."""
+        with self._cond:
+            if self.active < self.limit and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+
+            started = time.monotonic()
+            self.waiting += 1
+            self.queued += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.limit, self.max_wait)
+            finally:
+                self.waiting -= 1
+            waited = time.monotonic() - started
+            self.total_wait += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+            if not admitted:
+                self.shed += 1
+                return False
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'max_queue': self.max_queue,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'queued': self.queued,
+                'avg_queue_wait_seconds': round(self.total_wait / self.queued, 6) if self.queued else 0.0,
+                'max_queue_wait_seconds': round(self.max_wait_seen, 6),
+            }
+
+class AdmissionController:
+    """Flask middleware that admits or sheds each request by its blueprint's class."""
+
+    def __init__(self, classes: Optional[Dict[str, Dict]] = None):
+        classes = classes or PRIORITY_CLASSES
+        self.classes = {name: PriorityClass(name, **cfg) for name, cfg in classes.items()}
+
+    def init_app(self, app) -> None:
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+        app.extensions['admission'] = self
+
+    def classify(self) -> Optional[PriorityClass]:
+        if request.endpoint in EXEMPT_ENDPOINTS:
+            return None
+        name = ENDPOINT_CLASSES.get(request.endpoint) or BLUEPRINT_CLASSES.get(request.blueprint)
+        return self.classes.get(name)
+
+    def _admit(self):
+        priority = self.classify()
+        if priority is None:
+            return None
+        if not priority.acquire():
+            return self._shed_response()
+        g.admission_class = priority
+        return None
+
+    def _release(self, exc=None):
+        priority = g.pop('admission_class', None)
+        if priority is not None:
+            priority.release()
+
+    def _shed_response(self):
+        message = 'The library is busy, please retry shortly.'
+        if request.blueprint in ('api', 'async_api'):
+            response = make_response(jsonify({'error': message}), 503)
+        else:
+            response = make_response(message, 503)
+        response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
+
+    def metrics(self) -> Dict:
+        return {name: cls.metrics() for name, cls in self.classes.items()}
+
+def init_admission_control(app, classes: Optional[Dict[str, Dict]] = None) -> AdmissionController:
+    """Attach admission control to a Flask app."""
+    controller = AdmissionController(classes)
+    controller.init_app(app)
+    return controller
@@ -5,9 +5,16 @@ This module provides the application factory pattern for creating Flask app inst
 Routes are organized in separate blueprint modules in the routes package.
 """
 
+import os
 from flask import Flask
-from database import init_database, add_sample_data
+from database import (
+    init_database, add_sample_data, enable_read_replica, backfill_circulation_stats
+)
 from routes import register_blueprints
+from branch_router import configure_branches_from_env
+from change_feed import compact_change_log, start_compaction_timer
+from catalog_snapshot import load_snapshot
+from admission import init_admission_control
 
 
 def create_app():
@@ -26,9 +33,35 @@ def create_app():
     # Add sample data for testing and demonstration
     add_sample_data()
     
+    # Drop change-feed entries older than the retention window, now and periodically
+    compact_change_log()
+    start_compaction_timer()
+    
+    # Set up per-branch databases when LIBRARY_BRANCHES is configured
+    configure_branches_from_env()
+    
+    # Map a prebuilt catalog snapshot (python catalog_snapshot.py build) for fast warm-up
+    snapshot_path = os.environ.get('CATALOG_SNAPSHOT')
+    snapshot = load_snapshot(snapshot_path) if snapshot_path else None
+    
+    # Serve catalog reads from an in-memory replica when a staleness bound is configured,
+    # seeded from the snapshot when it is still current
+    staleness = os.environ.get('READ_REPLICA_MAX_STALENESS')
+    if staleness:
+        enable_read_replica(float(staleness), snapshot)
+    
     # Register all route blueprints
     register_blueprints(app)
     
+    # Per-priority concurrency limits so browsing cannot starve borrow/return
+    init_admission_control(app)
+    
+    @app.cli.command('backfill-stats')
+    def backfill_stats_command():
+        """Rebuild circulation statistics from borrow_records."""
+        daily, hourly = backfill_circulation_stats()
+        print(f'Rebuilt {daily} daily and {hourly} hourly circulation rows.')
+    
     return app
 
 
@@ -0,0 +1,11 @@
+"""
+ASGI entry point for the Library Management System.
+
+Wraps the Flask app so it can be served by an ASGI server, e.g.
+    uvicorn asgi:app --workers 4
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+from app import create_app
+
+app = WsgiToAsgi(create_app())
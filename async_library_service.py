@@ -0,0 +1,82 @@
+"""
+Async Library Service Module - asyncio-native business logic API
+Mirrors the blocking functions in library_service.py, running their database
+work on a bounded thread pool so the event loop never waits on SQLite
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import library_service
+import branch_router
+
+# Threads doing SQLite work; SQLite serialises writers, so a handful is enough
+DB_WORKERS = 4
+
+# Calls allowed to be running or queued before new ones are rejected
+MAX_PENDING = 64
+
+class ServiceOverloaded(Exception):
+    """Raised when the database executor already has MAX_PENDING calls in flight."""
+
+class DBExecutor:
+    """
+    Bounded executor for blocking database calls.
+    Admission is counted with a thread lock rather than an asyncio.Semaphore
+    because Flask runs each async view in its own event loop.
+    """
+
+    def __init__(self, workers: int = DB_WORKERS, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='library-db')
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func, *args):
+        """Run func(*args) on the pool, carrying over context such as branch routing."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ServiceOverloaded(f"{self._pending} database calls already pending")
+            self._pending += 1
+        try:
+            call = functools.partial(contextvars.copy_context().run, func, *args)
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+_executor = DBExecutor()
+
+def get_executor() -> DBExecutor:
+    """The shared executor used by the async service functions."""
+    return _executor
+
+async def borrow_book_by_patron_async(patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """
+    Async variant of library_service.borrow_book_by_patron (R3), with the
+    cross-branch borrowing limit applied when shards are configured.
+    """
+    return await _executor.run(branch_router.borrow_at_default, patron_id, book_id)
+
+async def return_book_by_patron_async(patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """Async variant of library_service.return_book_by_patron (R4)."""
+    return await _executor.run(library_service.return_book_by_patron, patron_id, book_id)
+
+async def search_books_in_catalog_async(search_term: str, search_type: str) -> List[Dict]:
+    """Async variant of library_service.search_books_in_catalog (R6)."""
+    return await _executor.run(library_service.search_books_in_catalog, search_term, search_type)
+
+async def get_patron_status_report_async(patron_id: str) -> Dict:
+    """Async variant of library_service.get_patron_status_report (R7)."""
+    return await _executor.run(library_service.get_patron_status_report, patron_id)
@@ -0,0 +1,172 @@
+"""
+Benchmark: HTTP throughput of the sync endpoints vs the /api/async/* endpoints.
+
+Runs the same mixed workload (searches, status reports and borrow/return
+pairs) over real HTTP against a throwaway SQLite file: first the sync
+routes (/api/search, /api/patrons/status, /borrow, /return), then their
+/api/async/* counterparts, both on a threaded WSGI server. If uvicorn is
+installed, the async routes are also run through asgi.py.
+
+    python benchmarks/async_vs_sync.py --requests 2000 --concurrency 16
+
+Under Flask, an async view still occupies its WSGI worker thread for the
+whole request (Flask runs it with asgiref's async_to_sync), and asgi.py's
+WsgiToAsgi runs the entire sync app in a thread pool. The numbers therefore
+measure the async service layer's bounded executor, not an event-loop
+server; don't expect the async routes to raise the concurrency ceiling.
+Admission control stays on, so shed requests show up as 503s.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import database  # noqa: E402
+import async_library_service  # noqa: E402
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # /borrow and /return redirect to the catalog page; time the POST alone
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+def _seed(books: int):
+    for i in range(books):
+        database.insert_book(f'Benchmark Title {i}', f'Author {i % 50}', f'{i:013d}', 5, 5)
+
+def _workload(requests: int, books: int):
+    """Deterministic mix: 60% search, 20% status report, 20% borrow+return."""
+    ops = []
+    for i in range(requests):
+        kind = i % 5
+        if kind < 3:
+            ops.append(('search', f'title {i % books}', 'title'))
+        elif kind == 3:
+            ops.append(('status', f'{100000 + i % 500:06d}'))
+        else:
+            ops.append(('loan', f'{100000 + i % 500:06d}', 1 + i % books))
+    return ops
+
+def _send(url: str, data: bytes = None, content_type: str = None) -> int:
+    req = urllib.request.Request(url, data=data)
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    try:
+        with _opener.open(req) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+
+def _json(url: str, payload) -> int:
+    return _send(url, json.dumps(payload).encode(), 'application/json')
+
+def _form(url: str, fields) -> int:
+    return _send(url, urllib.parse.urlencode(fields).encode(), 'application/x-www-form-urlencoded')
+
+def _run_sync(base: str, op):
+    if op[0] == 'search':
+        return [_send(f'{base}/api/search?' + urllib.parse.urlencode({'q': op[1], 'type': op[2]}))]
+    if op[0] == 'status':
+        return [_json(f'{base}/api/patrons/status', {'patron_ids': [op[1]]})]
+    fields = {'patron_id': op[1], 'book_id': op[2]}
+    return [_form(f'{base}/borrow', fields), _form(f'{base}/return', fields)]
+
+def _run_async(base: str, op):
+    if op[0] == 'search':
+        return [_send(f'{base}/api/async/search?' + urllib.parse.urlencode({'q': op[1], 'type': op[2]}))]
+    if op[0] == 'status':
+        return [_send(f'{base}/api/async/patrons/{op[1]}/status')]
+    payload = {'patron_id': op[1], 'book_id': op[2]}
+    return [_json(f'{base}/api/async/borrow', payload), _json(f'{base}/api/async/return', payload)]
+
+def _bench(base: str, run, ops, concurrency: int):
+    """Wall time and response status counts for `ops` sent with `concurrency` clients."""
+    statuses = Counter()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for codes in pool.map(lambda op: run(base, op), ops):
+            statuses.update(codes)
+    return time.perf_counter() - started, statuses
+
+def _serve_wsgi(app):
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server.shutdown
+
+def _serve_asgi():
+    """asgi.py under uvicorn, or None if uvicorn is not installed."""
+    try:
+        import uvicorn
+    except ImportError:
+        return None
+    import asgi
+    server = uvicorn.Server(uvicorn.Config(asgi.app, host='127.0.0.1', port=0, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    def stop():
+        server.should_exit = True
+    return f'http://127.0.0.1:{port}', stop
+
+def _report(label: str, seconds: float, statuses: Counter):
+    total = sum(statuses.values())
+    codes = ' '.join(f'{code}={count}' for code, count in sorted(statuses.items()))
+    print(f'{label:<12} {seconds:8.3f}s  {total / seconds:10.1f} req/s  [{codes}]')
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--books', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE = os.path.join(tmp, 'bench.db')
+        from app import create_app
+        app = create_app()
+        _seed(args.books)
+        ops = _workload(args.requests, args.books)
+
+        print(f'requests={args.requests} concurrency={args.concurrency} books={args.books} '
+              f'(db workers={async_library_service.DB_WORKERS})')
+        base, stop = _serve_wsgi(app)
+        try:
+            _report('wsgi sync', *_bench(base, _run_sync, ops, args.concurrency))
+            _report('wsgi async', *_bench(base, _run_async, ops, args.concurrency))
+        finally:
+            stop()
+
+        served = _serve_asgi()
+        if served is None:
+            print('asgi async   skipped (pip install uvicorn to run asgi.py)')
+        else:
+            base, stop = served
+            try:
+                _report('asgi async', *_bench(base, _run_async, ops, args.concurrency))
+            finally:
+                stop()
+        async_library_service.get_executor().shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
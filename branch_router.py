@@ -0,0 +1,259 @@
+"""
+Branch Router Module - Multi-branch data layer
+Maps each library branch to its own SQLite database file (shard) and routes
+database work to the shard that owns it
+"""
+
+import os
+import sys
+import argparse
+import csv
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import database
+from database import (
+    use_database, init_database, search_books_case_insensitive, get_patron_borrow_count,
+    backfill_circulation_stats
+)
+from library_service import borrow_book_by_patron, return_book_by_patron, MAX_BORROWED_BOOKS
+
+# Branch name -> SQLite file. Empty means single-database mode (database.DATABASE).
+BRANCH_DATABASES: Dict[str, str] = {}
+
+# Upper bound on threads used to fan a search out across shards
+SEARCH_WORKERS = 8
+
+def configure_branches(mapping: Dict[str, str]) -> None:
+    """Register branch shards and make sure each one has the schema."""
+    BRANCH_DATABASES.clear()
+    BRANCH_DATABASES.update(mapping)
+    for branch in BRANCH_DATABASES:
+        with use_branch(branch):
+            init_database()
+
+def configure_branches_from_env(var: str = 'LIBRARY_BRANCHES') -> None:
+    """Load shards from an env var such as "main=library_main.db,east=library_east.db"."""
+    spec = os.environ.get(var, '').strip()
+    if not spec:
+        return
+    mapping = {}
+    for entry in spec.split(','):
+        branch, _, path = entry.partition('=')
+        if branch.strip() and path.strip():
+            mapping[branch.strip()] = path.strip()
+    configure_branches(mapping)
+
+def get_branch_database(branch: str) -> Optional[str]:
+    """Get the database file that owns a branch."""
+    return BRANCH_DATABASES.get(branch)
+
+@contextmanager
+def use_branch(branch: str):
+    """Route all database calls in this context to the branch's shard."""
+    path = get_branch_database(branch)
+    if path is None:
+        raise KeyError(f"Unknown branch: {branch}")
+    with use_database(path):
+        yield
+
+def get_branch_connection(branch: str):
+    """Get a connection to a branch's shard."""
+    with use_branch(branch):
+        return database.get_db_connection()
+
+# Routed operations
+
+def _search_branch(branch: str, search_term: str, search_type: str) -> List[Dict]:
+    with use_branch(branch):
+        books = search_books_case_insensitive(search_term, search_type)
+    for book in books:
+        book['branch'] = branch
+    return books
+
+def search_all_branches(search_term: str, search_type: str,
+                        branches: Optional[List[str]] = None) -> List[Dict]:
+    """Search every (or the given) branch in parallel and merge results by title."""
+    branches = list(branches if branches is not None else BRANCH_DATABASES)
+    if not branches:
+        return []
+    workers = min(SEARCH_WORKERS, len(branches))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        per_branch = pool.map(
+            lambda b: _search_branch(b, search_term or '', search_type or 'title'), branches
+        )
+        results = [book for books in per_branch for book in books]
+    return sorted(results, key=lambda b: (b['title'].lower(), b['branch']))
+
+def _borrow_count_in(path: str, patron_id: str) -> int:
+    with use_database(path):
+        return get_patron_borrow_count(patron_id)
+
+def _loan_databases() -> List[str]:
+    """Every file that can hold loans: the shards plus the default database, if separate."""
+    paths = list(BRANCH_DATABASES.values())
+    shard_files = {os.path.abspath(p) for p in paths}
+    if os.path.abspath(database.DATABASE) not in shard_files:
+        paths.append(database.DATABASE)
+    return paths
+
+def get_patron_borrow_count_all_branches(patron_id: str) -> int:
+    """Active loans for a patron summed over every shard and the default database."""
+    if not BRANCH_DATABASES:
+        return get_patron_borrow_count(patron_id)
+    paths = _loan_databases()
+    with ThreadPoolExecutor(max_workers=min(SEARCH_WORKERS, len(paths))) as pool:
+        return sum(pool.map(lambda p: _borrow_count_in(p, patron_id), paths))
+
+def _over_borrow_limit(patron_id: str) -> bool:
+    # Same comparison as borrow_book_by_patron, which only sees one database
+    return get_patron_borrow_count_all_branches(patron_id) > MAX_BORROWED_BOOKS
+
+_LIMIT_MESSAGE = f"You have reached the maximum borrowing limit of {MAX_BORROWED_BOOKS} books."
+
+def borrow_at_branch(branch: str, patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """
+    Borrow a book from the branch that owns it. The borrowing limit applies
+    to the patron's loans at all branches, not just this shard's.
+    """
+    if get_branch_database(branch) is None:
+        return False, "Unknown branch."
+    if _over_borrow_limit(patron_id):
+        return False, _LIMIT_MESSAGE
+    with use_branch(branch):
+        return borrow_book_by_patron(patron_id, book_id)
+
+def borrow_at_default(patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """
+    Borrow a book from the default database (requests without a branch).
+    When shards are configured, loans at every branch still count towards
+    the borrowing limit.
+    """
+    if BRANCH_DATABASES and _over_borrow_limit(patron_id):
+        return False, _LIMIT_MESSAGE
+    return borrow_book_by_patron(patron_id, book_id)
+
+def return_at_branch(branch: str, patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """Return a book to the branch that owns it."""
+    if get_branch_database(branch) is None:
+        return False, "Unknown branch."
+    with use_branch(branch):
+        return return_book_by_patron(patron_id, book_id)
+
+# Migration: split a single library.db into per-branch shards
+
+def _book_owned_tables(conn) -> List[str]:
+    """Tables with a book_id column, read from the schema so new ones are never missed."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    return [t for t in tables
+            if any(col[1] == 'book_id' for col in conn.execute(f'PRAGMA table_info({t})'))]
+
+def split_database_by_branch(source: str, destinations: Dict[str, str],
+                             assignments: Dict[int, str],
+                             default_branch: Optional[str] = None) -> Dict[str, int]:
+    """
+    Copy each book, with every row keyed by its book_id (loans, holds, change
+    log, daily rollups), from `source` into the shard of the branch it is
+    assigned to. Row IDs are preserved. The circulation rollups of each shard
+    are then rebuilt from its own loans, since the hourly totals are not
+    per book. Books without an assignment go to `default_branch`. Returns the
+    number of books per branch.
+    """
+    unknown = set(assignments.values()) - set(destinations)
+    if default_branch is not None and default_branch not in destinations:
+        unknown.add(default_branch)
+    if unknown:
+        raise ValueError(f"No destination database for branch(es): {', '.join(sorted(unknown))}")
+
+    src = sqlite3.connect(source)
+    src.row_factory = sqlite3.Row
+    book_ids = [row['id'] for row in src.execute('SELECT id FROM books')]
+    owners = {}
+    for book_id in book_ids:
+        owner = assignments.get(book_id, default_branch)
+        if owner is None:
+            src.close()
+            raise ValueError(f"Book {book_id} has no branch assignment and no default branch")
+        owners[book_id] = owner
+    book_tables = _book_owned_tables(src)
+
+    # Refuse to merge into populated shards before writing anything
+    for branch, path in destinations.items():
+        with use_database(path):
+            init_database()
+            conn = database.get_db_connection()
+        populated = conn.execute('SELECT COUNT(*) FROM books').fetchone()[0]
+        conn.close()
+        if populated:
+            src.close()
+            raise ValueError(f"Destination for branch {branch} already contains books: {path}")
+
+    counts = {}
+    for branch, path in destinations.items():
+        dest = sqlite3.connect(path)
+        ids = [book_id for book_id, owner in owners.items() if owner == branch]
+        for table in ['books'] + book_tables:
+            key = 'id' if table == 'books' else 'book_id'
+            for start in range(0, len(ids), database.SQLITE_MAX_VARIABLES):
+                chunk = ids[start:start + database.SQLITE_MAX_VARIABLES]
+                placeholders = ','.join('?' * len(chunk))
+                rows = src.execute(
+                    f'SELECT * FROM {table} WHERE {key} IN ({placeholders})', chunk
+                ).fetchall()
+                if not rows:
+                    continue
+                columns = rows[0].keys()
+                dest.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    [tuple(r) for r in rows]
+                )
+        dest.commit()
+        dest.close()
+        with use_database(path):
+            backfill_circulation_stats()
+        counts[branch] = len(ids)
+    src.close()
+    return counts
+
+def _read_assignments(path: str) -> Dict[int, str]:
+    """Read a CSV of "book_id,branch" rows (a header row is optional)."""
+    assignments = {}
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and row[0].strip().isdigit():
+                assignments[int(row[0])] = row[1].strip()
+    return assignments
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Split a library database into per-branch shards.')
+    parser.add_argument('source', help='existing database file, e.g. library.db')
+    parser.add_argument('--branch', action='append', required=True, metavar='NAME=PATH',
+                        help='destination shard for a branch (repeatable)')
+    parser.add_argument('--assignments', metavar='CSV', help='CSV of book_id,branch rows')
+    parser.add_argument('--default-branch', help='branch for books not in the assignments file')
+    args = parser.parse_args(argv)
+
+    destinations = {}
+    for entry in args.branch:
+        name, _, path = entry.partition('=')
+        if not name or not path:
+            parser.error(f'--branch expects NAME=PATH, got {entry!r}')
+        destinations[name] = path
+    assignments = _read_assignments(args.assignments) if args.assignments else {}
+
+    try:
+        counts = split_database_by_branch(args.source, destinations, assignments, args.default_branch)
+    except ValueError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    for branch, count in counts.items():
+        print(f'{branch}: {count} books -> {destinations[branch]}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
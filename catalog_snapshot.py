@@ -0,0 +1,186 @@
+"""
+Catalog Snapshot Module - Compact, memory-mapped copy of the books table
+Lets new workers read the catalog from a shared file instead of rebuilding
+it from SQLite; stale snapshots are detected and bypassed
+
+File layout (little-endian, sections 8-byte aligned):
+    header      magic, format version, book count, catalog version, pool size
+    ids         int64[count]      books in catalog (title) order
+    total       int32[count]
+    available   int32[count]
+    by_id       uint32[count]     row indexes sorted by book id
+    offsets     uint32[3*count+1] start of each title/author/isbn in the pool
+    pool        UTF-8 string bytes
+"""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from database import get_catalog_with_version, get_catalog_change_bounds, get_all_books
+
+MAGIC = b'LMSCATSN'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sHHIqQ')
+_STRING_FIELDS = ('title', 'author', 'isbn')
+
+# Default location, overridable with CATALOG_SNAPSHOT
+SNAPSHOT_PATH = os.environ.get('CATALOG_SNAPSHOT', 'catalog.snapshot')
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def _layout(count: int):
+    """Byte offsets of each section after the header."""
+    ids = _aligned(_HEADER.size)
+    total = _aligned(ids + 8 * count)
+    available = _aligned(total + 4 * count)
+    by_id = _aligned(available + 4 * count)
+    offsets = _aligned(by_id + 4 * count)
+    pool = _aligned(offsets + 4 * (3 * count + 1))
+    return ids, total, available, by_id, offsets, pool
+
+def build_snapshot(path: str = SNAPSHOT_PATH) -> int:
+    """Write the current catalog to `path` atomically; returns the number of books."""
+    if sys.byteorder != 'little':
+        raise RuntimeError('Catalog snapshots are only supported on little-endian hosts')
+    version, books = get_catalog_with_version()
+    count = len(books)
+
+    pool = bytearray()
+    offsets = array('I', [0])
+    for book in books:
+        for field in _STRING_FIELDS:
+            pool += book[field].encode('utf-8')
+            offsets.append(len(pool))
+    by_id = array('I', sorted(range(count), key=lambda i: books[i]['id']))
+    sections = (
+        array('q', [b['id'] for b in books]),
+        array('i', [b['total_copies'] for b in books]),
+        array('i', [b['available_copies'] for b in books]),
+        by_id,
+        offsets,
+        pool,
+    )
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, count, version, len(pool)))
+        for start, data in zip(_layout(count), sections):
+            f.write(b'\0' * (start - f.tell()))
+            f.write(data)
+    # Readers that already mapped the old file keep it; new ones see the new file
+    os.replace(tmp_path, path)
+    return count
+
+class CatalogSnapshot:
+    """Read-only, zero-copy view over a snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, _, count, version, pool_size = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} catalog snapshot')
+        self.path = path
+        self.version = version
+        self._count = count
+        ids, total, available, by_id, offsets, pool = _layout(count)
+        view = memoryview(self._mm)
+        self._ids = view[ids:ids + 8 * count].cast('q')
+        self._total = view[total:total + 4 * count].cast('i')
+        self._available = view[available:available + 4 * count].cast('i')
+        self._by_id = view[by_id:by_id + 4 * count].cast('I')
+        self._offsets = view[offsets:offsets + 4 * (3 * count + 1)].cast('I')
+        self._pool = view[pool:pool + pool_size]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, index: int) -> str:
+        return str(self._pool[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def book(self, row: int) -> Dict:
+        """The book at a row (catalog order), shaped like a books table row."""
+        return {
+            'id': self._ids[row],
+            'title': self._string(3 * row),
+            'author': self._string(3 * row + 1),
+            'isbn': self._string(3 * row + 2),
+            'total_copies': self._total[row],
+            'available_copies': self._available[row],
+        }
+
+    def iter_books(self) -> Iterator[Dict]:
+        for row in range(self._count):
+            yield self.book(row)
+
+    def books(self) -> List[Dict]:
+        """All books, in the same order as get_all_books()."""
+        return list(self.iter_books())
+
+    def _row_for_id(self, book_id: int) -> Optional[int]:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ids[self._by_id[mid]] < book_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._ids[self._by_id[lo]] == book_id:
+            return self._by_id[lo]
+        return None
+
+    def get_book_by_id(self, book_id: int) -> Optional[Dict]:
+        row = self._row_for_id(book_id)
+        return self.book(row) if row is not None else None
+
+    def is_current(self) -> bool:
+        """True if no catalog change has been logged since the snapshot was built."""
+        return get_catalog_change_bounds()[1] == self.version
+
+    def close(self) -> None:
+        for view in (self._ids, self._total, self._available, self._by_id, self._offsets, self._pool):
+            view.release()
+        self._mm.close()
+
+_snapshot: Optional[CatalogSnapshot] = None
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Optional[CatalogSnapshot]:
+    """Map a snapshot for this process; returns None if the file is missing or invalid."""
+    global _snapshot
+    unload_snapshot()
+    try:
+        _snapshot = CatalogSnapshot(path)
+    except (OSError, ValueError, struct.error):
+        _snapshot = None
+    return _snapshot
+
+def unload_snapshot() -> None:
+    global _snapshot
+    if _snapshot is not None:
+        _snapshot.close()
+    _snapshot = None
+
+def get_catalog_books() -> List[Dict]:
+    """Catalog books from the mapped snapshot when it is current, otherwise from SQLite."""
+    if _snapshot is not None and _snapshot.is_current():
+        return _snapshot.books()
+    return get_all_books()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != 'build':
+        print('usage: python catalog_snapshot.py build [PATH]', file=sys.stderr)
+        return 2
+    path = argv[1] if len(argv) > 1 else SNAPSHOT_PATH
+    count = build_snapshot(path)
+    print(f'Wrote {count} books to {path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
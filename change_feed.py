@@ -0,0 +1,234 @@
+"""
+Change Feed Module - In-process dispatcher for catalog change notifications
+Long-poll and SSE clients wait here instead of each one querying the database;
+each branch shard has its own change log and so its own dispatcher
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from database import (
+    add_catalog_change_listener, get_catalog_changes_since,
+    get_catalog_change_bounds, compact_catalog_changes, use_database
+)
+from branch_router import BRANCH_DATABASES
+
+logger = logging.getLogger(__name__)
+
+# Recent changes kept in memory for waiting clients
+CHANGE_BUFFER_SIZE = 1000
+
+# How often (seconds) one waiter re-reads the log, to pick up other processes' writes
+POLL_INTERVAL = 1.0
+
+# Upper bound (seconds) on a single wait, whatever the caller asks for
+MAX_WAIT = 300.0
+
+# How long change-log entries are kept, and how often old ones are removed
+RETENTION = timedelta(hours=float(os.environ.get('CATALOG_CHANGES_RETENTION_HOURS', '24')))
+COMPACT_INTERVAL = 3600.0
+
+class ChangeDispatcher:
+    """
+    Fans catalog changes out to waiting clients. Writes in this process are
+    pushed in by database.py; at most one caller per POLL_INTERVAL reads the
+    change log for writes made elsewhere and refreshes the oldest retained seq.
+    `database` is the shard file whose log it follows (None: the default database).
+    """
+
+    def __init__(self, buffer_size: int = CHANGE_BUFFER_SIZE, poll_interval: float = POLL_INTERVAL,
+                 database: Optional[str] = None):
+        self.database = database
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._poll_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget buffered state, e.g. after switching databases."""
+        with self._cond:
+            self._buffer: List[Dict] = []
+            self._latest: Optional[int] = None
+            self._oldest: Optional[int] = None
+            self._last_poll = 0.0
+
+    def _log(self):
+        """Route this dispatcher's change-log reads to its database."""
+        return use_database(self.database) if self.database else nullcontext()
+
+    def publish(self, change: Dict) -> None:
+        """Record a committed change and wake waiting clients."""
+        with self._cond:
+            gap = change['seq'] - self._latest - 1 if self._latest is not None else 0
+            if 0 < gap < self.buffer_size:
+                # Other processes committed the seqs in between; fetch them first
+                # so the buffer stays contiguous (on failure _append restarts it)
+                try:
+                    with self._log():
+                        missed = get_catalog_changes_since(self._latest, gap)
+                    for earlier in missed:
+                        self._append(earlier)
+                except sqlite3.Error:
+                    pass
+            self._append(change)
+            self._cond.notify_all()
+
+    def _append(self, change: Dict) -> None:
+        """Buffer a change if it extends the contiguous run ending at _latest."""
+        if self._latest is not None:
+            if change['seq'] <= self._latest:
+                return
+            if change['seq'] != self._latest + 1:
+                # Can't vouch for the seqs in between; clients behind this
+                # point fall back to reading the log
+                self._buffer.clear()
+        self._buffer.append(change)
+        if len(self._buffer) > self.buffer_size:
+            del self._buffer[:len(self._buffer) - self.buffer_size]
+        self._latest = change['seq']
+
+    def latest_seq(self) -> int:
+        """Highest seq known, reading the log bounds once if they have not been loaded yet."""
+        with self._cond:
+            if self._latest is not None and self._oldest is not None:
+                return self._latest
+        with self._log():
+            oldest, latest = get_catalog_change_bounds()
+        with self._cond:
+            if self._oldest is None:
+                self._oldest = oldest
+            if self._latest is None:
+                self._latest = latest
+            return self._latest
+
+    def refresh_oldest(self) -> None:
+        """Re-read the oldest retained seq, e.g. after compaction."""
+        with self._log():
+            oldest, _ = get_catalog_change_bounds()
+        with self._cond:
+            self._oldest = oldest
+
+    def _from_buffer(self, since: int, limit: int) -> Optional[List[Dict]]:
+        """Changes after `since` from memory, or None if the buffer does not reach back that far."""
+        if self._latest is not None and since >= self._latest:
+            return []
+        if self._buffer and self._buffer[0]['seq'] <= since + 1:
+            return [c for c in self._buffer if c['seq'] > since][:limit]
+        return None
+
+    def _poll(self) -> None:
+        """Pull changes committed by other processes; shared by all callers."""
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if now - self._last_poll < self.poll_interval:
+                return
+            self._last_poll = now
+            # Read and publish under the condition's (re-entrant) lock so an
+            # in-process publish cannot slip a later seq in between
+            with self._cond, self._log():
+                for change in get_catalog_changes_since(self.latest_seq(), self.buffer_size):
+                    self._append(change)
+                self._cond.notify_all()
+                self.refresh_oldest()
+        finally:
+            self._poll_lock.release()
+
+    def wait_for_changes(self, since: int, timeout: float, limit: int = 500) -> List[Dict]:
+        """Return changes after `since`, waiting up to `timeout` seconds for one to arrive."""
+        # A NaN deadline would never expire; treat non-finite timeouts as "don't wait"
+        timeout = min(max(timeout, 0.0), MAX_WAIT) if math.isfinite(timeout) else 0.0
+        self.latest_seq()
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                changes = self._from_buffer(since, limit)
+            if changes is None:
+                # Client is further behind than the buffer; read the log directly
+                with self._log():
+                    return get_catalog_changes_since(since, limit)
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                return changes
+            self._poll()
+            with self._cond:
+                if self._from_buffer(since, limit) == []:
+                    self._cond.wait(min(remaining, self.poll_interval))
+
+    def is_behind_retention(self, since: int) -> bool:
+        """True if changes after `since` have been compacted away (client must reload)."""
+        self.latest_seq()
+        self._poll()
+        with self._cond:
+            return since < self._latest and since < self._oldest - 1
+
+# The default database's dispatcher, and one per branch shard file
+dispatcher = ChangeDispatcher()
+_shard_dispatchers: Dict[str, ChangeDispatcher] = {}
+_shard_dispatchers_lock = threading.Lock()
+
+def get_dispatcher(database: Optional[str] = None) -> ChangeDispatcher:
+    """Dispatcher for a shard file, or the default one when `database` is None."""
+    if database is None:
+        return dispatcher
+    with _shard_dispatchers_lock:
+        if database not in _shard_dispatchers:
+            _shard_dispatchers[database] = ChangeDispatcher(database=database)
+        return _shard_dispatchers[database]
+
+def _publish(change: Dict, database: Optional[str]) -> None:
+    get_dispatcher(database).publish(change)
+
+add_catalog_change_listener(_publish)
+
+def compact_change_log(older_than: Optional[datetime] = None) -> int:
+    """
+    Remove change-log entries older than `older_than` (default: the retention
+    window) from the default database and every branch shard.
+    """
+    older_than = older_than or datetime.now() - RETENTION
+    removed = compact_catalog_changes(older_than)
+    dispatcher.refresh_oldest()
+    for path in list(BRANCH_DATABASES.values()):
+        with use_database(path):
+            removed += compact_catalog_changes(older_than)
+        get_dispatcher(path).refresh_oldest()
+    return removed
+
+_compactor: Optional[threading.Thread] = None
+_compactor_stop = threading.Event()
+
+def start_compaction_timer(interval: float = COMPACT_INTERVAL) -> None:
+    """Compact the change log every `interval` seconds on a daemon thread (once per process)."""
+    global _compactor
+    if _compactor and _compactor.is_alive():
+        return
+    _compactor_stop.clear()
+
+    def run():
+        while not _compactor_stop.wait(interval):
+            try:
+                compact_change_log()
+            except Exception:
+                # e.g. "database is locked" under writer contention; try again next round
+                logger.exception('Change-log compaction failed')
+
+    _compactor = threading.Thread(target=run, name='change-log-compactor', daemon=True)
+    _compactor.start()
+
+def stop_compaction_timer() -> None:
+    """Stop the compaction thread started by start_compaction_timer."""
+    global _compactor
+    _compactor_stop.set()
+    if _compactor:
+        _compactor.join()
+    _compactor = None
@@ -62,6 +62,8 @@ def _per_test_memdb(monkeypatch):
         return _open_conn(db_uri)
 
     monkeypatch.setattr(database, "get_db_connection", _get_conn)
+    # Tables/indexes added on top of the base schema (holds, ...)
+    database.init_database()
 
     try:
         yield
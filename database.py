@@ -3,19 +3,43 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import itertools
+import logging
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Database configuration
 DATABASE = 'library.db'
 
+# Database file for the current request/task; branch routing overrides DATABASE through it
+_active_database: ContextVar[Optional[str]] = ContextVar('active_database', default=None)
+
+# SQLite builds older than 3.32 cap bound parameters at 999 per statement;
+# bulk lookups are split into chunks that stay safely below that limit.
+SQLITE_MAX_VARIABLES = 900
+
 def get_db_connection():
     """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(_active_database.get() or DATABASE)
     conn.row_factory = sqlite3.Row  # This enables column access by name
     return conn
 
+@contextmanager
+def use_database(path: str):
+    """Route every connection opened in this context to another database file."""
+    token = _active_database.set(path)
+    try:
+        yield
+    finally:
+        _active_database.reset(token)
+
 def init_database():
     """Initialize the database with required tables."""
     conn = get_db_connection()
@@ -45,6 +69,81 @@ def init_database():
         )
     ''')
     
+    # Patron lookups (status reports, borrow counts) filter on patron_id
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron
+        ON borrow_records (patron_id, return_date)
+    ''')
+    
+    # Create holds table (reservation queue per book)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS holds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patron_id TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'waiting',
+            created_at TEXT NOT NULL,
+            ready_at TEXT,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+    
+    # Only waiting holds are indexed, so the queue head is found without
+    # walking past fulfilled/cancelled history.
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_holds_book_position
+        ON holds (book_id, position) WHERE status = 'waiting'
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_holds_patron
+        ON holds (patron_id, status)
+    ''')
+    
+    # Append-only log of catalog changes, written in the same transaction as the change
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            change_type TEXT NOT NULL,
+            available_copies INTEGER NOT NULL,
+            total_copies INTEGER NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_catalog_changes_changed_at
+        ON catalog_changes (changed_at)
+    ''')
+    
+    # Circulation rollups, maintained by the borrow/return paths
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS circulation_daily (
+            day TEXT NOT NULL,
+            book_id INTEGER NOT NULL,
+            borrows INTEGER NOT NULL DEFAULT 0,
+            returns INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, book_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS circulation_hourly (
+            hour TEXT PRIMARY KEY,
+            borrows INTEGER NOT NULL DEFAULT 0,
+            returns INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    
+    # Per-book queue counters: next position to hand out and queue length
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS hold_queues (
+            book_id INTEGER PRIMARY KEY,
+            next_position INTEGER NOT NULL,
+            waiting_count INTEGER NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    ''')
+    
     conn.commit()
     conn.close()
 
@@ -82,10 +181,244 @@ def add_sample_data():
     
     conn.close()
 
+# Read replica: catalog reads served from an in-memory copy of the books table
+
+# Seconds a copy may be served before reads go back to the primary
+REPLICA_MAX_STALENESS = 1.0
+
+# Shortest pause between the background refresher's version checks
+REPLICA_MIN_REFRESH_INTERVAL = 0.05
+
+_replica_generations = itertools.count(1)
+
+class ReadReplica:
+    """
+    In-memory copy of the books table, held in a named shared-cache memory
+    database. Each reading thread has its own connection to it, so reads run
+    in parallel. A background thread checks the catalog change log
+    (catalog_changes) every max_staleness / 2 seconds and, when it has moved
+    on, builds a new copy and swaps it in; loans, rollups and other tables
+    never trigger a copy. If the refresher falls behind the staleness bound,
+    reads go to the primary instead.
+    """
+
+    def __init__(self, max_staleness: float = REPLICA_MAX_STALENESS, snapshot=None):
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()          # guards the current copy and counters
+        self._refresh_lock = threading.Lock()  # one rebuild at a time
+        self._local = threading.local()        # per-thread connection to the current copy
+        self._uri: Optional[str] = None
+        self._anchor = None                    # keeps the current copy alive
+        self._version = None
+        self.synced_at = 0.0  # last time the copy was confirmed to match the primary
+        self.refreshes = 0
+        self.reads = 0
+        self.primary_reads = 0
+        self.last_refresh_seconds = 0.0
+        if snapshot is not None and snapshot.is_current():
+            # Warm up from the mapped catalog snapshot instead of scanning books
+            self._install(snapshot.version, snapshot.iter_books(), time.monotonic())
+        else:
+            self.refresh()
+        self._stop = threading.Event()
+        self._refresher = threading.Thread(target=self._run, name='read-replica-refresher', daemon=True)
+        self._refresher.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(self.max_staleness / 2, REPLICA_MIN_REFRESH_INTERVAL)):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Read replica refresh failed')
+
+    def refresh(self) -> None:
+        """Rebuild the copy if the catalog version has changed since it was taken."""
+        with self._refresh_lock:
+            version = get_catalog_version()
+            if version == self._version:
+                with self._lock:
+                    self.synced_at = time.monotonic()
+                return
+            started = time.monotonic()
+            self._install(*get_catalog_with_version(), started)
+
+    def _install(self, version: int, books: Iterable[Dict], started: float) -> None:
+        """Build a new copy from `books` and make it the one readers see."""
+        uri = f'file:books_replica_{next(_replica_generations)}?mode=memory&cache=shared'
+        # Created here, closed by whichever thread replaces or disables the copy
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        anchor.execute('''
+            CREATE TABLE books (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                author TEXT NOT NULL,
+                isbn TEXT NOT NULL,
+                total_copies INTEGER NOT NULL,
+                available_copies INTEGER NOT NULL
+            )
+        ''')
+        anchor.executemany(
+            'INSERT INTO books (id, title, author, isbn, total_copies, available_copies) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(b['id'], b['title'], b['author'], b['isbn'], b['total_copies'],
+              b['available_copies']) for b in books]
+        )
+        anchor.commit()
+        with self._lock:
+            old, self._anchor = self._anchor, anchor
+            self._uri = uri
+            self._version = version
+            self.synced_at = time.monotonic()
+            self.last_refresh_seconds = self.synced_at - started
+            self.refreshes += 1
+        # Threads still connected to the old copy keep it alive until their next read
+        if old:
+            old.close()
+
+    def _connection(self):
+        """This thread's connection to the current copy, or None if there is none."""
+        local = self._local
+        with self._lock:
+            if self._uri is None:
+                return None
+            if getattr(local, 'uri', None) != self._uri:
+                if getattr(local, 'conn', None):
+                    local.conn.close()
+                # Connect under the lock so the copy can't be dropped in between
+                local.conn = sqlite3.connect(self._uri, uri=True)
+                local.conn.row_factory = sqlite3.Row
+                local.uri = self._uri
+            return local.conn
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict]:
+        """Run a read-only books query against the copy, or the primary if the copy may be too stale."""
+        with self._lock:
+            fresh = time.monotonic() - self.synced_at < self.max_staleness
+        conn = self._connection() if fresh else None
+        if conn is None:
+            with self._lock:
+                self.primary_reads += 1
+            conn = get_db_connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.close()
+            return [dict(r) for r in rows]
+        rows = conn.execute(sql, params).fetchall()
+        with self._lock:
+            self.reads += 1
+        return [dict(r) for r in rows]
+
+    def metrics(self) -> Dict:
+        """Replica lag and refresh counters."""
+        with self._lock:
+            return {
+                'enabled': True,
+                'max_staleness_seconds': self.max_staleness,
+                'lag_seconds': round(time.monotonic() - self.synced_at, 3),
+                'catalog_version': self._version,
+                'refreshes': self.refreshes,
+                'reads': self.reads,
+                'primary_reads': self.primary_reads,
+                'last_refresh_seconds': round(self.last_refresh_seconds, 6),
+            }
+
+    def close(self):
+        self._stop.set()
+        self._refresher.join()
+        with self._refresh_lock, self._lock:
+            if self._anchor:
+                self._anchor.close()
+            self._anchor = None
+            self._uri = None
+
+_read_replica: Optional[ReadReplica] = None
+
+def enable_read_replica(max_staleness: float = REPLICA_MAX_STALENESS, snapshot=None) -> None:
+    """
+    Serve get_all_books and search_books_case_insensitive from an in-memory
+    replica, seeded from a catalog_snapshot.CatalogSnapshot when it is current.
+    """
+    global _read_replica
+    disable_read_replica()
+    _read_replica = ReadReplica(max_staleness, snapshot)
+
+def disable_read_replica() -> None:
+    """Route catalog reads back to the primary database."""
+    global _read_replica
+    if _read_replica:
+        _read_replica.close()
+    _read_replica = None
+
+def get_replica_metrics() -> Dict:
+    """Metrics for the read replica (lag, refreshes, reads)."""
+    return _read_replica.metrics() if _read_replica else {'enabled': False}
+
+def _current_replica() -> Optional[ReadReplica]:
+    # The replica mirrors DATABASE only; branch shards always read their own file
+    if _active_database.get() is not None:
+        return None
+    return _read_replica
+
+# Row versions: bumped by every write that changes a book row, so rendered
+# fragments of that row (see fragment_cache.py) know when to re-render
+
+_book_versions: Dict[int, int] = {}
+_book_versions_lock = threading.Lock()
+
+def _bump_book_version(book_id: int) -> None:
+    with _book_versions_lock:
+        _book_versions[book_id] = _book_versions.get(book_id, 0) + 1
+
+def get_book_version(book_id: int) -> int:
+    """Current in-process version of a book row."""
+    return _book_versions.get(book_id, 0)
+
+# Catalog change log: every write to a book row appends to catalog_changes in
+# the same transaction, then notifies in-process listeners (see change_feed.py)
+
+_catalog_change_listeners: List = []
+
+# Held across commit + notify so listeners see changes in seq order
+_catalog_change_lock = threading.Lock()
+
+def add_catalog_change_listener(listener) -> None:
+    """
+    Register a callable invoked as listener(change, database) with each
+    committed catalog change; `database` is the shard file it was written to,
+    or None for the default database.
+    """
+    _catalog_change_listeners.append(listener)
+
+def _log_catalog_change(conn, book_id: int, change_type: str) -> Optional[Dict]:
+    """Append the book's current state to catalog_changes; caller owns the transaction."""
+    changed_at = datetime.now().isoformat()
+    cur = conn.execute('''
+        INSERT INTO catalog_changes (book_id, change_type, available_copies, total_copies, changed_at)
+        SELECT id, ?, available_copies, total_copies, ? FROM books WHERE id = ?
+    ''', (change_type, changed_at, book_id))
+    if cur.rowcount == 0:
+        return None
+    row = conn.execute('SELECT * FROM catalog_changes WHERE seq = ?', (cur.lastrowid,)).fetchone()
+    return dict(row)
+
+def _commit_book_change(conn, change: Optional[Dict]) -> None:
+    """Commit a transaction that changed a book row and publish the change."""
+    with _catalog_change_lock:
+        conn.commit()
+        if not change:
+            return
+        _bump_book_version(change['book_id'])
+        # Each shard has its own log (and seqs), so listeners are told which one
+        database = _active_database.get()
+        for listener in _catalog_change_listeners:
+            listener(change, database)
+
 # Helper Functions for Database Operations
 
 def get_all_books() -> List[Dict]:
     """Get all books from the database."""
+    replica = _current_replica()
+    if replica:
+        return replica.query('SELECT * FROM books ORDER BY title')
     conn = get_db_connection()
     books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
     conn.close()
@@ -105,6 +438,23 @@ def get_book_by_isbn(isbn: str) -> Optional[Dict]:
     conn.close()
     return dict(book) if book else None
 
+def get_books_availability(book_ids: List[int] = None, isbns: List[str] = None) -> List[Dict]:
+    """Get availability for many books by ID and/or ISBN using one connection."""
+    columns = 'id, isbn, title, total_copies, available_copies'
+    conn = get_db_connection()
+    rows = {}
+    for field, keys in (('id', book_ids or []), ('isbn', isbns or [])):
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(
+                f'SELECT {columns} FROM books WHERE {field} IN ({placeholders})', chunk
+            ).fetchall():
+                rows[row['id']] = dict(row)
+    conn.close()
+    return [rows[book_id] for book_id in sorted(rows)]
+
 def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     """Get currently borrowed books for a patron."""
     conn = get_db_connection()
@@ -113,7 +463,7 @@ def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
         FROM borrow_records br 
         JOIN books b ON br.book_id = b.id 
         WHERE br.patron_id = ? AND br.return_date IS NULL
-        ORDER BY br.borrow_date
+        ORDER BY br.borrow_date, br.id
     ''', (patron_id,)).fetchall()
     conn.close()
     
@@ -144,14 +494,16 @@ def insert_book(title: str, author: str, isbn: str, total_copies: int, available
     """Insert a new book into the database."""
     conn = get_db_connection()
     try:
-        conn.execute('''
+        cur = conn.execute('''
             INSERT INTO books (title, author, isbn, total_copies, available_copies)
             VALUES (?, ?, ?, ?, ?)
         ''', (title, author, isbn, total_copies, available_copies))
-        conn.commit()
+        change = _log_catalog_change(conn, cur.lastrowid, 'insert')
+        _commit_book_change(conn, change)
         conn.close()
         return True
     except Exception:
+        conn.rollback()
         conn.close()
         return False
 
@@ -163,10 +515,12 @@ def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, du
             INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
             VALUES (?, ?, ?, ?)
         ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+        _record_circulation(conn, book_id, borrow_date, borrows=1)
         conn.commit()
         conn.close()
         return True
     except Exception:
+        conn.rollback()
         conn.close()
         return False
 
@@ -184,10 +538,12 @@ def update_book_availability(book_id: int, change: int) -> bool:
             conn.close()
             return False
         conn.execute('UPDATE books SET available_copies = ? WHERE id = ?', (new_value, book_id))
-        conn.commit()
+        change = _log_catalog_change(conn, book_id, 'availability')
+        _commit_book_change(conn, change)
         conn.close()
         return True
     except Exception:
+        conn.rollback()
         conn.close()
         return False
 
@@ -215,6 +571,9 @@ def search_books_case_insensitive(search_term: str, search_type: str) -> List[Di
     if search_type not in ("title", "author", "isbn"):
         search_type = "title"
     q = f"%{(search_term or '').lower()}%"
+    replica = _current_replica()
+    if replica:
+        return replica.query(f"SELECT * FROM books WHERE LOWER({search_type}) LIKE ?", (q,))
     conn = get_db_connection()
     rows = conn.execute(f"SELECT * FROM books WHERE LOWER({search_type}) LIKE ?", (q,)).fetchall()
     conn.close()
@@ -224,7 +583,7 @@ def get_patron_history(patron_id: str) -> List[Dict]:
     """Full borrow history for a patron."""
     conn = get_db_connection()
     rows = conn.execute(
-        "SELECT * FROM borrow_records WHERE patron_id=? ORDER BY borrow_date",
+        "SELECT * FROM borrow_records WHERE patron_id=? ORDER BY borrow_date, id",
         (patron_id,)
     ).fetchall()
     conn.close()
@@ -242,6 +601,74 @@ def get_active_borrow_due_date(patron_id: str, book_id: int) -> Optional[datetim
     conn.close()
     return datetime.fromisoformat(row["due_date"]) if row else None
 
+def get_patron_status_batch(patron_ids: List[str], today: str, include_history: bool = False,
+                            history_limit: Optional[int] = None, history_offset: int = 0) -> Dict[str, Dict]:
+    """
+    Status data for many patrons over one connection: active loans, counts and
+    late-fee totals (computed in SQL with the same rules as
+    compute_late_fee_from_due, as of `today`), and optionally a page of history.
+    """
+    conn = get_db_connection()
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS status_patrons (patron_id TEXT PRIMARY KEY)')
+    conn.execute('DELETE FROM status_patrons')
+    conn.executemany('INSERT OR IGNORE INTO status_patrons (patron_id) VALUES (?)',
+                     [(p,) for p in patron_ids])
+
+    results = {p: {'borrowed_books': [], 'active_loans': 0, 'total_late_fees': 0.0}
+               for p in patron_ids}
+    totals = conn.execute('''
+        SELECT patron_id, COUNT(*) AS active_loans, SUM(
+            CASE WHEN days <= 0 THEN 0.0
+                 ELSE MIN(15.0, ROUND(MIN(7, days) * 0.5 + MAX(0, days - 7) * 1.0, 2))
+            END) AS total_late_fees
+        FROM (
+            SELECT br.patron_id,
+                   CAST(julianday(?) - julianday(substr(br.due_date, 1, 10)) AS INTEGER) AS days
+            FROM borrow_records br
+            JOIN status_patrons sp ON sp.patron_id = br.patron_id
+            JOIN books b ON br.book_id = b.id
+            WHERE br.return_date IS NULL
+        )
+        GROUP BY patron_id
+    ''', (today,)).fetchall()
+    for row in totals:
+        results[row['patron_id']]['active_loans'] = row['active_loans']
+        results[row['patron_id']]['total_late_fees'] = row['total_late_fees']
+
+    loans = conn.execute('''
+        SELECT br.patron_id, br.book_id
+        FROM borrow_records br
+        JOIN status_patrons sp ON sp.patron_id = br.patron_id
+        JOIN books b ON br.book_id = b.id
+        WHERE br.return_date IS NULL
+        ORDER BY br.patron_id, br.borrow_date, br.id
+    ''').fetchall()
+    for row in loans:
+        results[row['patron_id']]['borrowed_books'].append(row['book_id'])
+
+    if include_history:
+        for report in results.values():
+            report['history'] = []
+        upper = -1 if history_limit is None else history_offset + history_limit
+        history = conn.execute('''
+            SELECT * FROM (
+                SELECT br.*, ROW_NUMBER() OVER (
+                    PARTITION BY br.patron_id ORDER BY br.borrow_date, br.id
+                ) AS row_number
+                FROM borrow_records br
+                JOIN status_patrons sp ON sp.patron_id = br.patron_id
+            )
+            WHERE row_number > ? AND (? < 0 OR row_number <= ?)
+            ORDER BY patron_id, row_number
+        ''', (history_offset, upper, upper)).fetchall()
+        for row in history:
+            record = dict(row)
+            del record['row_number']
+            results[row['patron_id']]['history'].append(record)
+
+    conn.close()
+    return results
+
 def compute_late_fee_from_due(due_date: datetime) -> float:
     """
     Fee rules (A2/R5):
@@ -256,3 +683,338 @@ def compute_late_fee_from_due(due_date: datetime) -> float:
     first = min(7, d) * 0.5
     rest = max(0, d - 7) * 1.0
     return min(15.0, round(first + rest, 2))
+
+# Hold / reservation queue helpers
+
+def _allocate_copy_to_next_hold(conn, book_id: int, ready_at: datetime) -> Optional[Dict]:
+    """Mark the head of a book's hold queue as ready; caller owns the transaction."""
+    row = conn.execute(
+        "SELECT * FROM holds WHERE book_id=? AND status='waiting' "
+        "ORDER BY position LIMIT 1",
+        (book_id,)
+    ).fetchone()
+    if not row:
+        return None
+    conn.execute("UPDATE holds SET status='ready', ready_at=? WHERE id=?",
+                 (ready_at.isoformat(), row["id"]))
+    conn.execute("UPDATE hold_queues SET waiting_count = waiting_count - 1 WHERE book_id=?",
+                 (book_id,))
+    hold = dict(row)
+    hold.update(status="ready", ready_at=ready_at.isoformat())
+    return hold
+
+def insert_hold(patron_id: str, book_id: int, created_at: datetime) -> Optional[Dict]:
+    """Append a hold to the end of a book's queue and return it."""
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO hold_queues (book_id, next_position, waiting_count) "
+            "VALUES (?, 1, 0)",
+            (book_id,)
+        )
+        # Bump the counter first so the write lock is held before reading it back
+        conn.execute(
+            "UPDATE hold_queues SET next_position = next_position + 1, "
+            "waiting_count = waiting_count + 1 WHERE book_id=?",
+            (book_id,)
+        )
+        position = conn.execute(
+            "SELECT next_position - 1 AS position FROM hold_queues WHERE book_id=?",
+            (book_id,)
+        ).fetchone()["position"]
+        cur = conn.execute(
+            "INSERT INTO holds (patron_id, book_id, position, status, created_at) "
+            "VALUES (?, ?, ?, 'waiting', ?)",
+            (patron_id, book_id, position, created_at.isoformat())
+        )
+        hold_id = cur.lastrowid
+        conn.commit()
+        conn.close()
+        return {"id": hold_id, "patron_id": patron_id, "book_id": book_id,
+                "position": position, "status": "waiting"}
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return None
+
+def get_active_hold(patron_id: str, book_id: int) -> Optional[Dict]:
+    """Get the patron's waiting or ready hold on a book, if any."""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT * FROM holds WHERE patron_id=? AND book_id=? "
+        "AND status IN ('waiting', 'ready') ORDER BY id LIMIT 1",
+        (patron_id, book_id)
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def fulfill_hold(hold_id: int) -> bool:
+    """Mark a ready hold as fulfilled once the patron checks the copy out."""
+    conn = get_db_connection()
+    try:
+        cur = conn.execute(
+            "UPDATE holds SET status='fulfilled' WHERE id=? AND status='ready'",
+            (hold_id,)
+        )
+        conn.commit()
+        conn.close()
+        return cur.rowcount == 1
+    except Exception:
+        conn.close()
+        return False
+
+def cancel_hold(patron_id: str, hold_id: int) -> bool:
+    """Cancel a patron's hold; a copy set aside for it moves on to the next hold."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM holds WHERE id=? AND patron_id=? "
+            "AND status IN ('waiting', 'ready')",
+            (hold_id, patron_id)
+        ).fetchone()
+        if not row:
+            conn.close()
+            return False
+        conn.execute("UPDATE holds SET status='cancelled' WHERE id=?", (hold_id,))
+        change = None
+        if row["status"] == "waiting":
+            conn.execute(
+                "UPDATE hold_queues SET waiting_count = waiting_count - 1 WHERE book_id=?",
+                (row["book_id"],)
+            )
+        elif not _allocate_copy_to_next_hold(conn, row["book_id"], datetime.now()):
+            conn.execute(
+                "UPDATE books SET available_copies = available_copies + 1 WHERE id=?",
+                (row["book_id"],)
+            )
+            change = _log_catalog_change(conn, row["book_id"], 'availability')
+        _commit_book_change(conn, change)
+        conn.close()
+        return True
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return False
+
+def get_patron_holds(patron_id: str) -> List[Dict]:
+    """Active holds for a patron, with the current place in each queue."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT h.id, h.book_id, b.title, h.status, h.created_at, h.ready_at,
+               CASE WHEN h.status = 'waiting' THEN (
+                   SELECT COUNT(*) FROM holds q
+                   WHERE q.book_id = h.book_id AND q.status = 'waiting'
+                   AND q.position <= h.position
+               ) END AS queue_position
+        FROM holds h
+        JOIN books b ON h.book_id = b.id
+        WHERE h.patron_id = ? AND h.status IN ('waiting', 'ready')
+        ORDER BY h.created_at
+    ''', (patron_id,)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def get_hold_queue_position(book_id: int, position: int) -> int:
+    """Place in the queue of the waiting hold at `position` (1 = next in line)."""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT COUNT(*) AS place FROM holds "
+        "WHERE book_id=? AND status='waiting' AND position <= ?",
+        (book_id, position)
+    ).fetchone()
+    conn.close()
+    return row["place"]
+
+def get_hold_queue_length(book_id: int) -> int:
+    """Number of patrons waiting for a book."""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT waiting_count FROM hold_queues WHERE book_id=?", (book_id,)
+    ).fetchone()
+    conn.close()
+    return row["waiting_count"] if row else 0
+
+def return_book_and_allocate(patron_id: str, book_id: int, return_date: datetime) -> Tuple[bool, Optional[Dict]]:
+    """
+    Close a patron's active loan and route the copy in one transaction:
+    to the next waiting hold if there is one, otherwise back to the shelf.
+    Returns (False, None) when there is no active loan to close.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.execute('''
+            UPDATE borrow_records 
+            SET return_date = ? 
+            WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+        ''', (return_date.isoformat(), patron_id, book_id))
+        if cur.rowcount == 0:
+            conn.rollback()
+            conn.close()
+            return False, None
+        _record_circulation(conn, book_id, return_date, returns=cur.rowcount)
+        hold = _allocate_copy_to_next_hold(conn, book_id, return_date)
+        change = None
+        if not hold:
+            conn.execute(
+                "UPDATE books SET available_copies = available_copies + 1 WHERE id=?",
+                (book_id,)
+            )
+            change = _log_catalog_change(conn, book_id, 'availability')
+        _commit_book_change(conn, change)
+        conn.close()
+        return True, hold
+    except Exception:
+        conn.rollback()
+        conn.close()
+        return False, None
+
+# Catalog change feed queries
+
+def get_catalog_changes_since(since: int, limit: int = 500) -> List[Dict]:
+    """Changes with seq greater than `since`, oldest first."""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT * FROM catalog_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def get_catalog_change_bounds() -> Tuple[int, int]:
+    """
+    (oldest retained seq, latest seq ever assigned). The latest seq survives
+    compaction because AUTOINCREMENT keeps it in sqlite_sequence.
+    """
+    conn = get_db_connection()
+    latest = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'catalog_changes'"
+    ).fetchone()
+    oldest = conn.execute("SELECT MIN(seq) AS seq FROM catalog_changes").fetchone()
+    conn.close()
+    latest = latest["seq"] if latest else 0
+    return (oldest["seq"] if oldest["seq"] is not None else latest + 1), latest
+
+def get_catalog_version() -> int:
+    """Latest catalog change-log seq; changes whenever a book row is written."""
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'catalog_changes'"
+    ).fetchone()
+    conn.close()
+    return row["seq"] if row else 0
+
+def get_catalog_with_version() -> Tuple[int, List[Dict]]:
+    """All books (title order) and the change-log seq they reflect, read in one transaction."""
+    conn = get_db_connection()
+    conn.execute('BEGIN')
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'catalog_changes'"
+    ).fetchone()
+    books = conn.execute('SELECT * FROM books ORDER BY title, id').fetchall()
+    conn.rollback()
+    conn.close()
+    return (row["seq"] if row else 0), [dict(b) for b in books]
+
+def compact_catalog_changes(older_than: datetime) -> int:
+    """Delete change-log entries recorded before `older_than`; returns rows removed."""
+    conn = get_db_connection()
+    try:
+        cur = conn.execute(
+            "DELETE FROM catalog_changes WHERE changed_at < ?", (older_than.isoformat(),)
+        )
+        conn.commit()
+        conn.close()
+        return cur.rowcount
+    except Exception:
+        conn.close()
+        return 0
+
+# Circulation statistics (rollups of borrow_records)
+
+def _record_circulation(conn, book_id: int, when: datetime, borrows: int = 0, returns: int = 0) -> None:
+    """Add to the daily/hourly rollups; caller owns the transaction."""
+    if not borrows and not returns:
+        return
+    conn.execute('''
+        INSERT INTO circulation_daily (day, book_id, borrows, returns) VALUES (?, ?, ?, ?)
+        ON CONFLICT (day, book_id) DO UPDATE SET
+            borrows = borrows + excluded.borrows, returns = returns + excluded.returns
+    ''', (when.strftime('%Y-%m-%d'), book_id, borrows, returns))
+    conn.execute('''
+        INSERT INTO circulation_hourly (hour, borrows, returns) VALUES (?, ?, ?)
+        ON CONFLICT (hour) DO UPDATE SET
+            borrows = borrows + excluded.borrows, returns = returns + excluded.returns
+    ''', (when.strftime('%Y-%m-%dT%H'), borrows, returns))
+
+def backfill_circulation_stats() -> Tuple[int, int]:
+    """Rebuild the rollups from borrow_records; returns (daily rows, hourly rows)."""
+    # ISO timestamps: the first 10 characters are the day, the first 13 the hour
+    events = '''
+        SELECT borrow_date AS at, book_id, 1 AS borrows, 0 AS returns FROM borrow_records
+        UNION ALL
+        SELECT return_date, book_id, 0, 1 FROM borrow_records WHERE return_date IS NOT NULL
+    '''
+    conn = get_db_connection()
+    try:
+        conn.execute('DELETE FROM circulation_daily')
+        conn.execute('DELETE FROM circulation_hourly')
+        daily = conn.execute(f'''
+            INSERT INTO circulation_daily (day, book_id, borrows, returns)
+            SELECT substr(at, 1, 10), book_id, SUM(borrows), SUM(returns)
+            FROM ({events}) GROUP BY substr(at, 1, 10), book_id
+        ''').rowcount
+        hourly = conn.execute(f'''
+            INSERT INTO circulation_hourly (hour, borrows, returns)
+            SELECT substr(at, 1, 13), SUM(borrows), SUM(returns)
+            FROM ({events}) GROUP BY substr(at, 1, 13)
+        ''').rowcount
+        conn.commit()
+        conn.close()
+        return daily, hourly
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+
+def get_top_borrowed_books(start_day: str, end_day: str, limit: int) -> List[Dict]:
+    """Most borrowed books between two days (inclusive, YYYY-MM-DD)."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT d.book_id, b.title, b.author, SUM(d.borrows) AS borrows
+        FROM circulation_daily d
+        JOIN books b ON d.book_id = b.id
+        WHERE d.day BETWEEN ? AND ?
+        GROUP BY d.book_id
+        HAVING SUM(d.borrows) > 0
+        ORDER BY borrows DESC, b.title
+        LIMIT ?
+    ''', (start_day, end_day, limit)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def get_author_circulation(start_day: str, end_day: str, limit: int) -> List[Dict]:
+    """Borrows per author between two days (inclusive)."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT b.author, SUM(d.borrows) AS borrows, COUNT(DISTINCT d.book_id) AS titles
+        FROM circulation_daily d
+        JOIN books b ON d.book_id = b.id
+        WHERE d.day BETWEEN ? AND ?
+        GROUP BY b.author
+        HAVING SUM(d.borrows) > 0
+        ORDER BY borrows DESC, b.author
+        LIMIT ?
+    ''', (start_day, end_day, limit)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def get_hourly_circulation(start_day: str, end_day: str) -> List[Dict]:
+    """Borrow/return totals per hour between two days (inclusive)."""
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT hour, borrows, returns FROM circulation_hourly
+        WHERE hour BETWEEN ? AND ?
+        ORDER BY hour
+    ''', (start_day, end_day + 'T23')).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
@@ -0,0 +1,69 @@
+"""
+Fragment Cache Module - Bounded cache of rendered HTML fragments
+Used by the catalog page to re-render only the book rows that changed
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from markupsafe import Markup
+
+# Default number of fragments kept; least recently used ones are evicted first
+FRAGMENT_CACHE_SIZE = int(os.environ.get('CATALOG_FRAGMENT_CACHE_SIZE', '5000'))
+
+class FragmentCache:
+    """
+    LRU cache of rendered fragments. Each entry is stored under its key
+    (e.g. a book id) together with the version it was rendered from; a lookup
+    with a different version re-renders and replaces the entry.
+    """
+
+    def __init__(self, max_entries: int = FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, key: Hashable, version: Hashable, render: Callable[[], str]) -> Markup:
+        """Return the cached fragment for (key, version), rendering it on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Render outside the lock; concurrent misses on one row just render twice
+        html = Markup(render())
+        with self._lock:
+            self._entries[key] = (version, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return html
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict:
+        """Size, hit/miss counts and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# Rendered <tr> rows of templates/catalog.html
+catalog_row_cache = FragmentCache()
@@ -7,12 +7,31 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from database import (
     get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
-    insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books,
+    insert_book, insert_borrow_record, update_book_availability, get_all_books,
     search_books_case_insensitive, get_patron_borrowed_books,
-    get_patron_history, get_active_borrow_due_date, compute_late_fee_from_due
+    get_patron_history, get_active_borrow_due_date, compute_late_fee_from_due,
+    get_books_availability, insert_hold, get_active_hold, fulfill_hold,
+    cancel_hold, get_patron_holds, get_hold_queue_position, return_book_and_allocate,
+    get_top_borrowed_books, get_author_circulation, get_hourly_circulation,
+    get_patron_status_batch
 )
 
+# Upper bound on identifiers accepted by a single bulk availability lookup
+MAX_AVAILABILITY_LOOKUP = 10000
+
+# Most books a patron may have on loan at once (across all branches)
+MAX_BORROWED_BOOKS = 5
+
+# SQLite stores integers as signed 64-bit values; larger Python ints cannot be bound
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+# Upper bound on patrons per batched status request
+MAX_STATUS_BATCH = 50000
+
+# Circulation statistics: default window and largest top-N
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_LIMIT = 100
+
 def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
     """
     Add a new book to the catalog.
@@ -60,13 +79,17 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     book = get_book_by_id(book_id)
     if not book:
         return False, "Book not found."
-    if book['available_copies'] <= 0:
+    
+    # A copy set aside for this patron's hold can be collected even when none are on the shelf
+    hold = get_active_hold(patron_id, book_id)
+    ready_hold = hold if hold and hold['status'] == 'ready' else None
+    if book['available_copies'] <= 0 and not ready_hold:
         return False, "This book is currently not available."
     
     # Check patron's current borrowed books count
     current_borrowed = get_patron_borrow_count(patron_id)
-    if current_borrowed > 5:
-        return False, "You have reached the maximum borrowing limit of 5 books."
+    if current_borrowed > MAX_BORROWED_BOOKS:
+        return False, f"You have reached the maximum borrowing limit of {MAX_BORROWED_BOOKS} books."
     
     # Create borrow record
     borrow_date = datetime.now()
@@ -75,7 +98,10 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     # Insert borrow record and update availability
     if not insert_borrow_record(patron_id, book_id, borrow_date, due_date):
         return False, "Database error occurred while creating borrow record."
-    if not update_book_availability(book_id, -1):
+    if ready_hold:
+        if not fulfill_hold(ready_hold['id']):
+            return False, "Database error occurred while collecting the held copy."
+    elif not update_book_availability(book_id, -1):
         return False, "Database error occurred while updating book availability."
     
     return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
@@ -88,15 +114,60 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     Process book return by a patron.
     Implements R4
     """
-    if not update_borrow_record_return_date(patron_id, book_id, datetime.now()):
+    success, hold = return_book_and_allocate(patron_id, book_id, datetime.now())
+    if not success:
         return False, "No active loan."
-    if not update_book_availability(book_id, +1):
-        return False, "Failed to restore inventory."
+    if hold:
+        return True, "Return successful. The copy has been set aside for the next patron on hold."
     return True, "Return successful."
 
 # Alias used by some tests
 ret = return_book_by_patron
 
+def place_hold_on_book(patron_id: str, book_id: int) -> Tuple[bool, str]:
+    """
+    Place a hold on a book that has no copies available.
+    Extends R3: patrons queue instead of re-checking availability
+    """
+    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+        return False, "Invalid patron ID. Must be exactly 6 digits."
+    
+    book = get_book_by_id(book_id)
+    if not book:
+        return False, "Book not found."
+    if book['available_copies'] > 0:
+        return False, "This book is available now and can be borrowed directly."
+    if get_active_hold(patron_id, book_id):
+        return False, "You already have a hold on this book."
+    if any(r['book_id'] == book_id for r in get_patron_borrowed_books(patron_id)):
+        return False, "You already have this book on loan."
+    
+    hold = insert_hold(patron_id, book_id, datetime.now())
+    if not hold:
+        return False, "Database error occurred while placing the hold."
+    
+    position = get_hold_queue_position(book_id, hold['position'])
+    return True, f'Hold placed on "{book["title"]}". You are number {position} in the queue.'
+
+def cancel_hold_for_patron(patron_id: str, hold_id: int) -> Tuple[bool, str]:
+    """
+    Cancel one of a patron's active holds.
+    """
+    if not cancel_hold(patron_id, hold_id):
+        return False, "No active hold found."
+    return True, "Hold cancelled."
+
+def get_patron_hold_report(patron_id: str) -> Dict:
+    """
+    List a patron's active holds with their queue positions.
+    """
+    holds = get_patron_holds(patron_id)
+    return {
+        "holds": holds,
+        "ready": [h["book_id"] for h in holds if h["status"] == "ready"],
+        "count": len(holds),
+    }
+
 def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
     """
     Calculate late fees for a specific book.
@@ -121,6 +192,41 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
 # Alias used by some tests
 search = search_books_in_catalog
 
+def is_valid_book_id(book_id) -> bool:
+    """True for an int (not bool) that fits in an SQLite INTEGER."""
+    return (isinstance(book_id, int) and not isinstance(book_id, bool)
+            and -SQLITE_MAX_INT - 1 <= book_id <= SQLITE_MAX_INT)
+
+def get_availability_for_books(book_ids: List[int], isbns: List[str]) -> Tuple[bool, Dict]:
+    """
+    Look up live availability for many books at once.
+    Supports bulk catalog views (R2) without one query per book
+    """
+    book_ids = book_ids or []
+    isbns = isbns or []
+    if not isinstance(book_ids, list) or not isinstance(isbns, list):
+        return False, {"error": "book_ids and isbns must be lists."}
+    if not book_ids and not isbns:
+        return False, {"error": "At least one book ID or ISBN is required."}
+    if len(book_ids) + len(isbns) > MAX_AVAILABILITY_LOOKUP:
+        return False, {"error": f"At most {MAX_AVAILABILITY_LOOKUP} books can be looked up per request."}
+    if not all(is_valid_book_id(b) for b in book_ids):
+        return False, {"error": "Book IDs must be 64-bit integers."}
+    if not all(isinstance(i, str) for i in isbns):
+        return False, {"error": "ISBNs must be strings."}
+
+    books = get_books_availability(book_ids, isbns)
+    found_ids = {b["id"] for b in books}
+    found_isbns = {b["isbn"] for b in books}
+    return True, {
+        "results": books,
+        "count": len(books),
+        "not_found": {
+            "book_ids": [b for b in dict.fromkeys(book_ids) if b not in found_ids],
+            "isbns": [i for i in dict.fromkeys(isbns) if i not in found_isbns],
+        },
+    }
+
 def get_patron_status_report(patron_id: str) -> Dict:
     """
     Get status report for a patron.
@@ -143,3 +249,83 @@ def get_patron_status_report(patron_id: str) -> Dict:
 
 # Alias used by some tests
 get_status = get_patron_status_report
+
+def get_patron_status_reports(patron_ids: List[str], include_history: bool = False,
+                              history_limit: Optional[int] = None,
+                              history_offset: int = 0) -> Dict[str, Dict]:
+    """
+    Status reports for many patrons at once (e.g. overdue-notice runs).
+    Batched R7: each report equals get_patron_status_report(patron_id);
+    "history" is only included when requested and can be paged.
+    """
+    patron_ids = list(dict.fromkeys(patron_ids))
+    if not patron_ids:
+        return {}
+    reports = get_patron_status_batch(
+        patron_ids, datetime.now().date().isoformat(),
+        include_history, history_limit, history_offset
+    )
+    for report in reports.values():
+        report["total_late_fees"] = round(report["total_late_fees"], 2)
+    return reports
+
+def _parse_stats_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[Tuple[str, str]], str]:
+    """Validate a YYYY-MM-DD range; defaults to the last STATS_DEFAULT_DAYS days."""
+    try:
+        end_day = datetime.strptime(end, "%Y-%m-%d").date() if end else datetime.now().date()
+        start_day = (datetime.strptime(start, "%Y-%m-%d").date() if start
+                     else end_day - timedelta(days=STATS_DEFAULT_DAYS - 1))
+    except ValueError:
+        return None, "Dates must be in YYYY-MM-DD format."
+    if start_day > end_day:
+        return None, "Start date must not be after end date."
+    return (start_day.isoformat(), end_day.isoformat()), ""
+
+def _parse_stats_limit(limit) -> Optional[int]:
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return None
+    return limit if 1 <= limit <= STATS_MAX_LIMIT else None
+
+def get_popular_books_report(start: Optional[str], end: Optional[str], limit=10) -> Tuple[bool, Dict]:
+    """
+    Most borrowed books in a date range, from the daily circulation rollup.
+    """
+    day_range, error = _parse_stats_range(start, end)
+    if not day_range:
+        return False, {"error": error}
+    top = _parse_stats_limit(limit)
+    if top is None:
+        return False, {"error": f"Limit must be between 1 and {STATS_MAX_LIMIT}."}
+    return True, {"start": day_range[0], "end": day_range[1],
+                  "books": get_top_borrowed_books(day_range[0], day_range[1], top)}
+
+def get_author_circulation_report(start: Optional[str], end: Optional[str], limit=10) -> Tuple[bool, Dict]:
+    """
+    Borrows per author in a date range, from the daily circulation rollup.
+    """
+    day_range, error = _parse_stats_range(start, end)
+    if not day_range:
+        return False, {"error": error}
+    top = _parse_stats_limit(limit)
+    if top is None:
+        return False, {"error": f"Limit must be between 1 and {STATS_MAX_LIMIT}."}
+    return True, {"start": day_range[0], "end": day_range[1],
+                  "authors": get_author_circulation(day_range[0], day_range[1], top)}
+
+def get_hourly_load_report(start: Optional[str], end: Optional[str]) -> Tuple[bool, Dict]:
+    """
+    Hourly borrow/return series plus the average load curve by hour of day.
+    """
+    day_range, error = _parse_stats_range(start, end)
+    if not day_range:
+        return False, {"error": error}
+    series = get_hourly_circulation(day_range[0], day_range[1])
+    by_hour = [{"hour": h, "borrows": 0, "returns": 0} for h in range(24)]
+    for row in series:
+        bucket = by_hour[int(row["hour"][11:13])]
+        bucket["borrows"] += row["borrows"]
+        bucket["returns"] += row["returns"]
+    return True, {"start": day_range[0], "end": day_range[1],
+                  "series": series, "by_hour_of_day": by_hour}
@@ -2,8 +2,25 @@
 API Routes - JSON API endpoints
 """
 
-from flask import Blueprint, jsonify, request
-from library_service import calculate_late_fee_for_book, search_books_in_catalog
+import json
+import math
+import time
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from library_service import (
+    calculate_late_fee_for_book, search_books_in_catalog, get_availability_for_books,
+    place_hold_on_book, cancel_hold_for_patron, get_patron_hold_report,
+    get_popular_books_report, get_author_circulation_report, get_hourly_load_report,
+    get_patron_status_reports, MAX_STATUS_BATCH, is_valid_book_id
+)
+from database import get_hold_queue_length, get_replica_metrics
+from branch_router import BRANCH_DATABASES, get_branch_database, search_all_branches
+from fragment_cache import catalog_row_cache
+from change_feed import dispatcher, get_dispatcher
+
+# Longest a long-poll request may wait, and how long one SSE connection stays open
+MAX_LONG_POLL_SECONDS = 30
+SSE_STREAM_SECONDS = 300
+SSE_HEARTBEAT_SECONDS = 15
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -24,12 +41,20 @@ def search_books_api():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    branch = request.args.get('branch', '').strip()
     
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
     
-    # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
+    # Use business logic function; ?branch=all (or a branch name) searches the shards
+    if branch == 'all':
+        books = search_all_branches(search_term, search_type)
+    elif branch:
+        if branch not in BRANCH_DATABASES:
+            return jsonify({'error': f'Unknown branch: {branch}'}), 404
+        books = search_all_branches(search_term, search_type, [branch])
+    else:
+        books = search_books_in_catalog(search_term, search_type)
     
     return jsonify({
         'search_term': search_term,
@@ -37,3 +62,206 @@ def search_books_api():
         'results': books,
         'count': len(books)
     })
+
+@api_bp.route('/availability', methods=['POST'])
+def bulk_availability_api():
+    """
+    Look up availability for many books in one request.
+    Expects JSON: {"book_ids": [1, 2, ...], "isbns": ["978...", ...]}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'JSON body with book_ids and/or isbns is required'}), 400
+    
+    success, result = get_availability_for_books(payload.get('book_ids'), payload.get('isbns'))
+    return jsonify(result), 200 if success else 400
+
+@api_bp.route('/holds', methods=['POST'])
+def place_hold_api():
+    """
+    Place a hold on an unavailable book.
+    Expects JSON: {"patron_id": "123456", "book_id": 1}
+    """
+    payload = request.get_json(silent=True) or {}
+    patron_id = str(payload.get('patron_id', '')).strip()
+    book_id = payload.get('book_id')
+    if not is_valid_book_id(book_id):
+        return jsonify({'error': 'Invalid book ID.'}), 400
+    
+    success, message = place_hold_on_book(patron_id, book_id)
+    return jsonify({'success': success, 'message': message}), 201 if success else 400
+
+@api_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+def cancel_hold_api(hold_id):
+    """
+    Cancel a hold. The owning patron is passed as ?patron_id=...
+    """
+    patron_id = request.args.get('patron_id', '').strip()
+    success, message = cancel_hold_for_patron(patron_id, hold_id)
+    return jsonify({'success': success, 'message': message}), 200 if success else 404
+
+@api_bp.route('/holds/<patron_id>')
+def patron_holds_api(patron_id):
+    """
+    List a patron's active holds and queue positions.
+    """
+    return jsonify(get_patron_hold_report(patron_id))
+
+@api_bp.route('/books/<int:book_id>/holds')
+def book_hold_queue_api(book_id):
+    """
+    Report how many patrons are waiting for a book.
+    """
+    return jsonify({'book_id': book_id, 'waiting': get_hold_queue_length(book_id)})
+
+@api_bp.route('/metrics')
+def metrics_api():
+    """
+    Operational metrics for caches, replicas and admission control.
+    """
+    admission = current_app.extensions.get('admission')
+    return jsonify({
+        'read_replica': get_replica_metrics(),
+        'catalog_fragments': catalog_row_cache.metrics(),
+        'admission': admission.metrics() if admission else None,
+    })
+
+def _change_cursor(value):
+    """Parse a since/Last-Event-ID cursor; None means "start from now"."""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+def _change_feed():
+    """Dispatcher for ?branch=, the default database's without it, or None for an unknown branch."""
+    branch = request.args.get('branch', '').strip()
+    if not branch:
+        return dispatcher
+    path = get_branch_database(branch)
+    return get_dispatcher(path) if path else None
+
+@api_bp.route('/changes')
+def catalog_changes_api():
+    """
+    Availability/catalog changes after ?since=<seq>.
+    With ?wait=<seconds> the request long-polls until a change arrives.
+    With ?branch=<name> the changes come from that branch's shard (its own seqs).
+    """
+    feed = _change_feed()
+    if feed is None:
+        return jsonify({'error': f"Unknown branch: {request.args.get('branch')}"}), 404
+    
+    since = _change_cursor(request.args.get('since'))
+    if since is None:
+        # No cursor yet: hand out the current position to start from
+        return jsonify({'changes': [], 'next': feed.latest_seq(), 'reset': False})
+    
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = None
+    if wait is None or not math.isfinite(wait):
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    wait = min(max(wait, 0), MAX_LONG_POLL_SECONDS)
+    
+    if feed.is_behind_retention(since):
+        # The log no longer reaches back this far; the client must reload the catalog
+        return jsonify({'changes': [], 'next': feed.latest_seq(), 'reset': True})
+    
+    changes = feed.wait_for_changes(since, wait)
+    return jsonify({
+        'changes': changes,
+        'next': changes[-1]['seq'] if changes else since,
+        'reset': False
+    })
+
+@api_bp.route('/changes/stream')
+def catalog_changes_stream():
+    """
+    Server-Sent Events stream of catalog changes. Resumes from Last-Event-ID
+    (or ?since=); the connection closes periodically and EventSource reconnects.
+    ?branch=<name> streams that branch's shard.
+    """
+    feed = _change_feed()
+    if feed is None:
+        return jsonify({'error': f"Unknown branch: {request.args.get('branch')}"}), 404
+    
+    since = _change_cursor(request.headers.get('Last-Event-ID', request.args.get('since')))
+    if since is None:
+        since = feed.latest_seq()
+    
+    def events(since):
+        if feed.is_behind_retention(since):
+            since = feed.latest_seq()
+            yield f'id: {since}\nevent: reset\ndata: {{}}\n\n'
+        closes_at = time.monotonic() + SSE_STREAM_SECONDS
+        while time.monotonic() < closes_at:
+            changes = feed.wait_for_changes(since, SSE_HEARTBEAT_SECONDS)
+            if not changes:
+                yield ': keep-alive\n\n'
+                continue
+            for change in changes:
+                since = change['seq']
+                yield f'id: {since}\nevent: change\ndata: {json.dumps(change)}\n\n'
+    
+    # Keep the request context (and its admission slot) until the stream ends
+    return Response(stream_with_context(events(since)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api_bp.route('/stats/top-books')
+def top_books_stats_api():
+    """
+    Most borrowed books. Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD&limit=10
+    """
+    success, result = get_popular_books_report(
+        request.args.get('start'), request.args.get('end'), request.args.get('limit', 10)
+    )
+    return jsonify(result), 200 if success else 400
+
+@api_bp.route('/stats/authors')
+def author_stats_api():
+    """
+    Circulation per author. Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD&limit=10
+    """
+    success, result = get_author_circulation_report(
+        request.args.get('start'), request.args.get('end'), request.args.get('limit', 10)
+    )
+    return jsonify(result), 200 if success else 400
+
+@api_bp.route('/stats/hourly')
+def hourly_stats_api():
+    """
+    Hourly borrow/return load. Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    """
+    success, result = get_hourly_load_report(request.args.get('start'), request.args.get('end'))
+    return jsonify(result), 200 if success else 400
+
+@api_bp.route('/patrons/status', methods=['POST'])
+def patron_status_batch_api():
+    """
+    Status reports for many patrons.
+    Expects JSON: {"patron_ids": [...], "include_history": false,
+                   "history_limit": 50, "history_offset": 0}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'JSON body with patron_ids is required'}), 400
+    
+    patron_ids = payload.get('patron_ids')
+    if not isinstance(patron_ids, list) or not all(isinstance(p, str) for p in patron_ids):
+        return jsonify({'error': 'patron_ids must be a list of strings'}), 400
+    if len(patron_ids) > MAX_STATUS_BATCH:
+        return jsonify({'error': f'At most {MAX_STATUS_BATCH} patrons can be requested at once'}), 400
+    
+    history_limit = payload.get('history_limit')
+    history_offset = payload.get('history_offset', 0)
+    if history_limit is not None and (not isinstance(history_limit, int) or history_limit < 0):
+        return jsonify({'error': 'history_limit must be a non-negative integer'}), 400
+    if not isinstance(history_offset, int) or history_offset < 0:
+        return jsonify({'error': 'history_offset must be a non-negative integer'}), 400
+    
+    reports = get_patron_status_reports(
+        patron_ids, bool(payload.get('include_history')), history_limit, history_offset
+    )
+    return jsonify({'reports': reports, 'count': len(reports)})
@@ -0,0 +1,77 @@
+"""
+Async API Routes - asyncio JSON endpoints backed by the async service layer
+Requires Flask's async extra (asgiref)
+"""
+
+from flask import Blueprint, jsonify, request
+from library_service import is_valid_book_id
+from async_library_service import (
+    ServiceOverloaded, borrow_book_by_patron_async, return_book_by_patron_async,
+    search_books_in_catalog_async, get_patron_status_report_async
+)
+
+async_api_bp = Blueprint('async_api', __name__, url_prefix='/api/async')
+
+# Seconds clients are asked to wait when the database executor is saturated
+RETRY_AFTER_SECONDS = 1
+
+@async_api_bp.errorhandler(ServiceOverloaded)
+def service_overloaded(error):
+    """Shed load instead of queueing without bound."""
+    response = jsonify({'error': 'Service is busy, please retry.'})
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response, 503
+
+def _loan_request():
+    payload = request.get_json(silent=True) or {}
+    patron_id = str(payload.get('patron_id', '')).strip()
+    book_id = payload.get('book_id')
+    if not is_valid_book_id(book_id):
+        return patron_id, None
+    return patron_id, book_id
+
+@async_api_bp.route('/borrow', methods=['POST'])
+async def borrow_book_async():
+    """
+    Borrow a book. Expects JSON: {"patron_id": "123456", "book_id": 1}
+    """
+    patron_id, book_id = _loan_request()
+    if book_id is None:
+        return jsonify({'success': False, 'message': 'Invalid book ID.'}), 400
+    success, message = await borrow_book_by_patron_async(patron_id, book_id)
+    return jsonify({'success': success, 'message': message}), 200 if success else 400
+
+@async_api_bp.route('/return', methods=['POST'])
+async def return_book_async():
+    """
+    Return a book. Expects JSON: {"patron_id": "123456", "book_id": 1}
+    """
+    patron_id, book_id = _loan_request()
+    if book_id is None:
+        return jsonify({'success': False, 'message': 'Invalid book ID.'}), 400
+    success, message = await return_book_by_patron_async(patron_id, book_id)
+    return jsonify({'success': success, 'message': message}), 200 if success else 400
+
+@async_api_bp.route('/search')
+async def search_books_async():
+    """
+    Search for books; same contract as /api/search.
+    """
+    search_term = request.args.get('q', '').strip()
+    search_type = request.args.get('type', 'title')
+    if not search_term:
+        return jsonify({'error': 'Search term is required'}), 400
+    books = await search_books_in_catalog_async(search_term, search_type)
+    return jsonify({
+        'search_term': search_term,
+        'search_type': search_type,
+        'results': books,
+        'count': len(books)
+    })
+
+@async_api_bp.route('/patrons/<patron_id>/status')
+async def patron_status_async(patron_id):
+    """
+    Patron status report (R7).
+    """
+    return jsonify(await get_patron_status_report_async(patron_id))
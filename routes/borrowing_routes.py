@@ -3,7 +3,8 @@ Borrowing Routes - Book borrowing and returning endpoints
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from library_service import borrow_book_by_patron, return_book_by_patron
+from library_service import return_book_by_patron
+from branch_router import borrow_at_branch, borrow_at_default, return_at_branch
 
 borrowing_bp = Blueprint('borrowing', __name__)
 
@@ -21,8 +22,12 @@ def borrow_book():
         flash('Invalid book ID.', 'error')
         return redirect(url_for('catalog.catalog'))
     
-    # Use business logic function
-    success, message = borrow_book_by_patron(patron_id, book_id)
+    # Use business logic function, routed to the owning branch when one is given
+    branch = request.form.get('branch', '').strip()
+    if branch:
+        success, message = borrow_at_branch(branch, patron_id, book_id)
+    else:
+        success, message = borrow_at_default(patron_id, book_id)
     
     flash(message, 'success' if success else 'error')
     return redirect(url_for('catalog.catalog'))
@@ -44,8 +49,12 @@ def return_book():
         flash('Invalid book ID.', 'error')
         return render_template('return_book.html')
     
-    # Use business logic function
-    success, message = return_book_by_patron(patron_id, book_id)
+    # Use business logic function, routed to the owning branch when one is given
+    branch = request.form.get('branch', '').strip()
+    if branch:
+        success, message = return_at_branch(branch, patron_id, book_id)
+    else:
+        success, message = return_book_by_patron(patron_id, book_id)
     
     flash(message, 'success' if success else 'error')
     return render_template('return_book.html')
@@ -3,7 +3,10 @@ Catalog Routes - Book catalog related endpoints
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_all_books
+from markupsafe import Markup
+from database import get_book_version
+from catalog_snapshot import get_catalog_books
+from fragment_cache import catalog_row_cache
 from library_service import add_book_to_catalog
 
 catalog_bp = Blueprint('catalog', __name__)
@@ -19,8 +22,19 @@ def catalog():
     Display all books in the catalog.
     Implements R2: Book Catalog Display
     """
-    books = get_all_books()
-    return render_template('catalog.html', books=books)
+    books = get_catalog_books()
+    rows = [_render_catalog_row(book) for book in books]
+    return render_template('catalog.html', books=books, rows=Markup('\n'.join(rows)))
+
+def _render_catalog_row(book):
+    """Render one catalog row, reusing the cached HTML while the row is unchanged."""
+    # The row values are part of the version so writes from other processes,
+    # which do not bump this process's row versions, still invalidate the row.
+    version = (get_book_version(book['id']), book['title'], book['author'], book['isbn'],
+               book['total_copies'], book['available_copies'])
+    return catalog_row_cache.get_or_render(
+        book['id'], version, lambda: render_template('_catalog_row.html', book=book)
+    )
 
 @catalog_bp.route('/add_book', methods=['GET', 'POST'])
 def add_book():
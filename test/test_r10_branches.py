@@ -0,0 +1,139 @@
+import importlib
+import pytest
+
+db = importlib.import_module("database")
+router = importlib.import_module("branch_router")
+
+# Captured at import, before the per-test in-memory DB patch is applied
+_file_backed_connection = db.get_db_connection
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "get_db_connection", _file_backed_connection)
+    monkeypatch.setattr(router, "BRANCH_DATABASES", {})
+    # library.db stays live next to the shards
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+    db.init_database()
+    paths = {"main": str(tmp_path / "main.db"), "east": str(tmp_path / "east.db")}
+    router.configure_branches(paths)
+    return paths
+
+def _seed(branch, title, isbn, copies):
+    with router.use_branch(branch):
+        db.insert_book(title, "Auth", isbn, copies, copies)
+
+def test_r10_search_fans_out_and_merges(shards):
+    """
+    Branches: cross-branch search queries every shard and merges results by title.
+    """
+    _seed("main", "Python Tricks", "3000000000001", 1)
+    _seed("east", "Learning Python", "3000000000002", 1)
+    _seed("east", "Unrelated", "3000000000003", 1)
+
+    results = router.search_all_branches("python", "title")
+    assert [(b["title"], b["branch"]) for b in results] == [
+        ("Learning Python", "east"), ("Python Tricks", "main"),
+    ]
+
+def test_r10_borrow_and_return_route_to_owning_shard(shards):
+    """
+    Branches: book 1 exists in both shards; only the addressed shard changes.
+    """
+    _seed("main", "Main Copy", "3000000000004", 1)
+    _seed("east", "East Copy", "3000000000005", 1)
+
+    assert router.borrow_at_branch("east", "123456", 1)[0]
+    with router.use_branch("east"):
+        assert db.get_book_by_id(1)["available_copies"] == 0
+    with router.use_branch("main"):
+        assert db.get_book_by_id(1)["available_copies"] == 1
+
+    assert not router.return_at_branch("main", "123456", 1)[0]
+    assert router.return_at_branch("east", "123456", 1)[0]
+    assert router.borrow_at_branch("west", "123456", 1) == (False, "Unknown branch.")
+
+def test_r10_borrow_limit_spans_all_branches(shards):
+    """
+    Branches: loans at other branches count towards the patron's borrowing limit.
+    """
+    limit = importlib.import_module("library_service").MAX_BORROWED_BOOKS
+    for i in range(limit + 1):
+        _seed("main", f"Main {i}", f"31{i:011d}", 1)
+        assert router.borrow_at_branch("main", "123456", i + 1)[0]
+    _seed("east", "East Only", "3200000000000", 1)
+
+    assert router.get_patron_borrow_count_all_branches("123456") == limit + 1
+    ok, msg = router.borrow_at_branch("east", "123456", 1)
+    assert not ok and "maximum borrowing limit" in msg
+
+    # Requests without a branch use library.db but still see every shard's loans
+    db.insert_book("Default DB", "Auth", "3300000000000", 1, 1)
+    ok, msg = router.borrow_at_default("123456", 1)
+    assert not ok and "maximum borrowing limit" in msg
+
+def test_r10_default_database_loans_count_towards_limit(shards):
+    """
+    Branches: loans held in library.db (outside the shards) count for branch borrows.
+    """
+    limit = importlib.import_module("library_service").MAX_BORROWED_BOOKS
+    for i in range(limit + 1):
+        db.insert_book(f"Default {i}", "Auth", f"34{i:011d}", 1, 1)
+        assert router.borrow_at_default("123456", i + 1)[0]
+    _seed("east", "East Only", "3500000000000", 1)
+
+    assert router.get_patron_borrow_count_all_branches("123456") == limit + 1
+    ok, msg = router.borrow_at_branch("east", "123456", 1)
+    assert not ok and "maximum borrowing limit" in msg
+
+def test_r10_split_existing_database(tmp_path, monkeypatch):
+    """
+    Branches: the migration tool moves books and their loans into per-branch files.
+    """
+    monkeypatch.setattr(db, "get_db_connection", _file_backed_connection)
+    source = str(tmp_path / "library.db")
+    with db.use_database(source):
+        db.init_database()
+        db.add_sample_data()
+        assert importlib.import_module("library_service").borrow_book_by_patron("654321", 1)[0]
+
+    dest = {"main": str(tmp_path / "main.db"), "east": str(tmp_path / "east.db")}
+    counts = router.split_database_by_branch(source, dest, {3: "east"}, default_branch="main")
+    assert counts == {"main": 2, "east": 1}
+
+    with db.use_database(dest["east"]):
+        assert db.get_book_by_id(3)["title"] == "1984"
+        assert db.get_patron_borrow_count("123456") == 1
+    with db.use_database(dest["main"]):
+        assert db.get_book_by_id(3) is None
+        conn = db.get_db_connection()
+        # Every book-keyed table moves with the book
+        for table in ("catalog_changes", "circulation_daily"):
+            assert conn.execute(f"SELECT book_id FROM {table}").fetchall()[0][0] == 1
+        conn.close()
+        # Hourly rollups are rebuilt per shard from the shard's own loans
+        assert sum(h["borrows"] for h in db.get_hourly_circulation("0000-01-01", "9999-12-31")) == 1
+    with db.use_database(dest["east"]):
+        assert sum(h["borrows"] for h in db.get_hourly_circulation("0000-01-01", "9999-12-31")) == 1
+
+    with pytest.raises(ValueError):
+        router.split_database_by_branch(source, dest, {}, default_branch="main")
+
+def test_r10_change_feed_covers_each_branch(shards, client):
+    """
+    Branches: writes routed to a shard reach that branch's change feed, not the default one.
+    """
+    feed = importlib.import_module("change_feed")
+    feed.dispatcher.reset()
+    _seed("east", "East Feed", "3600000000000", 2)
+    start = client.get("/api/changes?branch=east").get_json()["next"]
+    default_start = client.get("/api/changes").get_json()["next"]
+
+    assert router.borrow_at_branch("east", "123456", 1)[0]
+    east = feed.get_dispatcher(shards["east"])
+    assert [c["seq"] for c in east._buffer][-1] == start + 1, "pushed, not polled"
+
+    data = client.get(f"/api/changes?branch=east&since={start}").get_json()
+    assert [(c["book_id"], c["available_copies"]) for c in data["changes"]] == [(1, 1)]
+    assert client.get(f"/api/changes?since={default_start}").get_json()["changes"] == []
+    assert client.get("/api/changes?branch=west").status_code == 404
+    assert client.get("/api/changes/stream?branch=west").status_code == 404
@@ -0,0 +1,96 @@
+import importlib
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+search = getattr(lib, "search_books_in_catalog")
+
+@pytest.fixture
+def replica():
+    def _enable(max_staleness):
+        db.enable_read_replica(max_staleness)
+    yield _enable
+    db.disable_read_replica()
+
+@pytest.mark.usefixtures("temp_db")
+def test_r11_replica_serves_reads_within_staleness_bound(replica):
+    """
+    Read replica: reads come from the copy until it is refreshed or too stale.
+    """
+    add_book("Before Snapshot", "Auth", "4000000000001", 1)
+    replica(3600)
+    add_book("After Snapshot", "Auth", "4000000000002", 1)
+
+    assert [b["title"] for b in db.get_all_books()] == ["Before Snapshot"]
+    assert search("after", "title") == []
+
+    db._read_replica.refresh()
+    assert len(db.get_all_books()) == 2
+    assert search("after", "title")[0]["isbn"] == "4000000000002"
+
+    add_book("Past The Bound", "Auth", "4000000000003", 1)
+    db._read_replica.max_staleness = 0
+    assert len(db.get_all_books()) == 3, "a copy past the bound is bypassed"
+    assert db.get_replica_metrics()["primary_reads"] == 1
+
+@pytest.mark.usefixtures("temp_db")
+def test_r11_replica_only_recopies_on_version_change(replica):
+    """
+    Read replica: checks without catalog writes in between do not re-copy the books table.
+    """
+    from datetime import datetime, timedelta
+    add_book("Stable", "Auth", "4000000000004", 1)
+    replica(3600)
+    db._read_replica.refresh()
+    now = datetime.now()
+    db.insert_borrow_record("654321", 1, now, now + timedelta(days=14))
+    db._read_replica.refresh()
+    db.get_all_books()
+    db.get_all_books()
+    metrics = db.get_replica_metrics()
+    assert metrics["refreshes"] == 1 and metrics["reads"] == 2
+
+    add_book("Changed", "Auth", "4000000000005", 1)
+    db._read_replica.refresh()
+    assert len(db.get_all_books()) == 2
+    assert db.get_replica_metrics()["refreshes"] == 2
+
+@pytest.mark.usefixtures("temp_db")
+def test_r11_background_refresh_and_parallel_readers(replica):
+    """
+    Read replica: a background thread picks up catalog changes; each reader thread has its own connection.
+    """
+    import threading
+    import time
+    replica(0.2)
+    add_book("Refreshed In Background", "Auth", "4000000000006", 1)
+    deadline = time.monotonic() + 5
+    while db.get_replica_metrics()["refreshes"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert db.get_replica_metrics()["refreshes"] == 2
+
+    db._read_replica.max_staleness = 3600
+    results, connections = [], []
+
+    def read():
+        results.append(search("background", "title"))
+        connections.append(db._read_replica._local.conn)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+    assert [len(r) for r in results] == [1, 1, 1, 1]
+    assert len({id(c) for c in connections}) == 4
+
+@pytest.mark.usefixtures("temp_db")
+def test_r11_metrics_endpoint(client):
+    """
+    Read replica (API): /api/metrics reports replica state.
+    """
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.get_json()["read_replica"] == {"enabled": False}
+
@@ -0,0 +1,63 @@
+import asyncio
+import importlib
+import threading
+import pytest
+
+lib = importlib.import_module("library_service")
+async_lib = importlib.import_module("async_library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+
+@pytest.mark.usefixtures("temp_db")
+def test_r12_async_functions_match_sync_results():
+    """
+    Async service: each async variant returns what the sync function returns.
+    """
+    add_book("Async Book", "Auth", "5000000000001", 1)
+
+    async def scenario():
+        borrowed = await async_lib.borrow_book_by_patron_async("123456", 1)
+        found = await async_lib.search_books_in_catalog_async("async", "title")
+        status = await async_lib.get_patron_status_report_async("123456")
+        returned = await async_lib.return_book_by_patron_async("123456", 1)
+        return borrowed, found, status, returned
+
+    borrowed, found, status, returned = asyncio.run(scenario())
+    assert borrowed[0] and returned[0]
+    assert found[0]["available_copies"] == 0
+    assert status["borrowed_books"] == [1]
+    assert lib.search_books_in_catalog("async", "title")[0]["available_copies"] == 1
+
+def test_r12_executor_rejects_calls_beyond_pending_bound():
+    """
+    Async service: once max_pending calls are in flight, new calls fail fast.
+    """
+    executor = async_lib.DBExecutor(workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(async_lib.ServiceOverloaded):
+            await executor.run(lambda: None)
+        release.set()
+        await first
+        return executor.pending
+
+    try:
+        assert asyncio.run(scenario()) == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+@pytest.mark.usefixtures("temp_db")
+def test_r12_async_routes(client):
+    """
+    Async service (API): async views serve borrow and search.
+    """
+    resp = client.post("/api/async/borrow", json={"patron_id": "654321", "book_id": 1})
+    assert resp.status_code == 200 and resp.get_json()["success"]
+    resp = client.get("/api/async/search?q=gatsby")
+    assert resp.get_json()["count"] == 1
+    assert client.get("/api/async/patrons/654321/status").get_json()["active_loans"] == 1
+    resp = client.post("/api/async/return", json={"patron_id": "654321", "book_id": 2**70})
+    assert resp.status_code == 400
@@ -0,0 +1,45 @@
+import importlib
+import pytest
+
+lib = importlib.import_module("library_service")
+fragments = importlib.import_module("fragment_cache")
+borrow = getattr(lib, "borrow_book_by_patron")
+
+@pytest.fixture
+def row_cache(monkeypatch):
+    cache = fragments.FragmentCache(max_entries=100)
+    monkeypatch.setattr(fragments, "catalog_row_cache", cache)
+    catalog_routes = importlib.import_module("routes.catalog_routes")
+    monkeypatch.setattr(catalog_routes, "catalog_row_cache", cache)
+    return cache
+
+@pytest.mark.usefixtures("temp_db")
+def test_r13_only_changed_rows_rerender(client, row_cache):
+    """
+    Fragment cache: a repeat /catalog hit reuses every row; a borrow re-renders one.
+    """
+    first = client.get("/catalog")
+    assert first.status_code == 200
+    assert row_cache.metrics()["misses"] == 3
+
+    second = client.get("/catalog")
+    assert second.data == first.data
+    assert row_cache.metrics()["hits"] == 3
+
+    assert borrow("123456", 1)[0]
+    third = client.get("/catalog")
+    assert row_cache.metrics()["misses"] == 4
+    assert b"2/3 Available" in third.data
+
+def test_r13_cache_is_bounded():
+    """
+    Fragment cache: the least recently used fragment is evicted past max_entries.
+    """
+    cache = fragments.FragmentCache(max_entries=2)
+    for key in (1, 2, 1, 3):
+        cache.get_or_render(key, 0, lambda: f"<tr>{key}</tr>")
+    metrics = cache.metrics()
+    assert metrics["size"] == 2 and metrics["evictions"] == 1
+    assert metrics["hit_rate"] == 0.25
+    cache.get_or_render(1, 0, lambda: "unused")
+    assert cache.metrics()["hits"] == 2
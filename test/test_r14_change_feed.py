@@ -0,0 +1,142 @@
+import importlib
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+feed = importlib.import_module("change_feed")
+add_book = getattr(lib, "add_book_to_catalog")
+borrow = getattr(lib, "borrow_book_by_patron")
+
+@pytest.fixture(autouse=True)
+def fresh_dispatcher():
+    feed.dispatcher.reset()
+    yield
+    feed.dispatcher.reset()
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_writes_append_to_change_log():
+    """
+    Change feed: inserts and availability updates are logged with the new row state.
+    """
+    add_book("Logged", "Auth", "6000000000001", 2)
+    borrow("123456", 1)
+    changes = db.get_catalog_changes_since(0)
+    assert [(c["change_type"], c["available_copies"]) for c in changes] == [
+        ("insert", 2), ("availability", 1),
+    ]
+    assert not db.update_book_availability(99, -1)
+    assert db.get_catalog_change_bounds() == (1, 2)
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_long_poll_wakes_on_change():
+    """
+    Change feed: a waiting client is woken by a write instead of polling the DB.
+    """
+    add_book("Waited On", "Auth", "6000000000002", 1)
+    since = feed.dispatcher.latest_seq()
+    timer = threading.Timer(0.1, borrow, ("123456", 1))
+    timer.start()
+    started = time.monotonic()
+    changes = feed.dispatcher.wait_for_changes(since, timeout=5)
+    timer.join()
+    assert time.monotonic() - started < 2
+    assert [c["available_copies"] for c in changes] == [0]
+    assert feed.dispatcher.wait_for_changes(changes[-1]["seq"], timeout=0) == []
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_changes_api_and_reset_after_compaction(client):
+    """
+    Change feed (API): /api/changes pages through the log and signals a reset once compacted.
+    """
+    start = client.get("/api/changes").get_json()["next"]
+    borrow("123456", 1)
+    data = client.get(f"/api/changes?since={start}&wait=1").get_json()
+    assert data["reset"] is False
+    assert [(c["book_id"], c["available_copies"]) for c in data["changes"]] == [(1, 2)]
+
+    stream = client.get(f"/api/changes/stream?since={start}")
+    assert stream.mimetype == "text/event-stream"
+    first_event = next(stream.response).decode()
+    stream.close()
+    assert first_event.startswith(f"id: {data['next']}\nevent: change\n")
+
+    assert feed.compact_change_log(datetime.now() + timedelta(seconds=1)) >= 1
+    borrow("123456", 2)
+    data = client.get(f"/api/changes?since={start}").get_json()
+    assert data["reset"] is True and data["next"] > start
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_non_finite_wait_is_rejected(client):
+    """
+    Change feed (API): NaN/infinite waits are a 400, and the dispatcher never waits on them.
+    """
+    start = client.get("/api/changes").get_json()["next"]
+    for wait in ("nan", "inf", "-inf"):
+        assert client.get(f"/api/changes?since={start}&wait={wait}").status_code == 400
+
+    started = time.monotonic()
+    assert feed.dispatcher.wait_for_changes(start, float("nan")) == []
+    assert time.monotonic() - started < 1
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_retention_check_uses_cached_bounds(monkeypatch):
+    """
+    Change feed: retention checks reuse the bounds refreshed by the shared poll.
+    """
+    add_book("Retained", "Auth", "6000000000003", 1)
+    feed.dispatcher.is_behind_retention(0)
+    calls = []
+    real_bounds = feed.get_catalog_change_bounds
+    monkeypatch.setattr(feed, "get_catalog_change_bounds", lambda: calls.append(1) or real_bounds())
+    for _ in range(20):
+        assert not feed.dispatcher.is_behind_retention(0)
+    assert calls == []
+
+@pytest.mark.usefixtures("temp_db")
+def test_r14_changes_from_other_processes_are_not_skipped():
+    """
+    Change feed: a local write after another process's write does not hide the earlier seq.
+    """
+    add_book("Shared Log", "Auth", "6000000000004", 2)
+    assert feed.dispatcher.latest_seq() == 1
+
+    # Another worker process appends seq 2 to the shared log
+    conn = db.get_db_connection()
+    conn.execute(
+        "INSERT INTO catalog_changes (book_id, change_type, available_copies, total_copies, changed_at) "
+        "VALUES (1, 'availability', 1, 2, ?)", (datetime.now().isoformat(),)
+    )
+    conn.commit()
+    conn.close()
+
+    borrow("123456", 1)
+    changes = feed.dispatcher.wait_for_changes(1, timeout=0)
+    assert [c["seq"] for c in changes] == [2, 3]
+    assert [c["seq"] for c in db.get_catalog_changes_since(1)] == [2, 3]
+
+def test_r14_compaction_timer_survives_errors(monkeypatch):
+    """
+    Change feed: a failed compaction (e.g. database is locked) does not stop the timer.
+    """
+    import sqlite3
+    calls = []
+
+    def flaky_compaction():
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return 0
+
+    feed.stop_compaction_timer()
+    monkeypatch.setattr(feed, "compact_change_log", flaky_compaction)
+    feed.start_compaction_timer(0.01)
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        feed.stop_compaction_timer()
+    assert len(calls) >= 2
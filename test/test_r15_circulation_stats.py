@@ -0,0 +1,73 @@
+import importlib
+from datetime import datetime, timedelta
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+borrow = getattr(lib, "borrow_book_by_patron")
+ret = getattr(lib, "return_book_by_patron")
+
+def _rollups():
+    conn = db.get_db_connection()
+    daily = [tuple(r) for r in conn.execute(
+        "SELECT day, book_id, borrows, returns FROM circulation_daily ORDER BY day, book_id")]
+    hourly = [tuple(r) for r in conn.execute(
+        "SELECT hour, borrows, returns FROM circulation_hourly ORDER BY hour")]
+    conn.close()
+    return daily, hourly
+
+@pytest.mark.usefixtures("temp_db")
+def test_r15_rollups_track_borrow_and_return_and_match_backfill():
+    """
+    Stats: live rollup updates equal a backfill from borrow_records.
+    """
+    add_book("Popular", "Ann Author", "7000000000001", 3)
+    add_book("Quiet", "Ann Author", "7000000000002", 1)
+    last_week = datetime.now() - timedelta(days=7)
+    db.insert_borrow_record("111111", 2, last_week, last_week + timedelta(days=14))
+    borrow("111111", 1)
+    borrow("222222", 1)
+    ret("111111", 1)
+
+    live = _rollups()
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert (today, 1, 2, 1) in live[0]
+    assert db.backfill_circulation_stats() == (len(live[0]), len(live[1]))
+    assert _rollups() == live
+
+@pytest.mark.usefixtures("temp_db")
+def test_r15_top_books_authors_and_hourly_reports():
+    """
+    Stats: top-N and time-range reports are answered from the rollups.
+    """
+    add_book("Popular", "Ann Author", "7000000000003", 3)
+    add_book("Quiet", "Bob Writer", "7000000000004", 3)
+    for patron in ("111111", "222222"):
+        borrow(patron, 1)
+    borrow("333333", 2)
+
+    ok, report = lib.get_popular_books_report(None, None, 1)
+    assert ok and [(b["title"], b["borrows"]) for b in report["books"]] == [("Popular", 2)]
+    ok, report = lib.get_author_circulation_report(None, None, 10)
+    assert [(a["author"], a["borrows"]) for a in report["authors"]] == [
+        ("Ann Author", 2), ("Bob Writer", 1),
+    ]
+    ok, report = lib.get_hourly_load_report(None, None)
+    assert sum(h["borrows"] for h in report["by_hour_of_day"]) == 3
+    assert report["by_hour_of_day"][datetime.now().hour]["borrows"] == 3
+
+    ok, _ = lib.get_popular_books_report("2026-13-01", None, 10)
+    assert not ok
+
+@pytest.mark.usefixtures("temp_db")
+def test_r15_stats_api(client):
+    """
+    Stats (API): /api/stats/* endpoints return JSON and reject bad ranges.
+    """
+    borrow("123456", 1)
+    data = client.get("/api/stats/top-books?limit=5").get_json()
+    assert data["books"][0]["book_id"] == 1
+    assert client.get("/api/stats/hourly").status_code == 200
+    assert client.get("/api/stats/authors?start=2026-02-01&end=2026-01-01").status_code == 400
+    assert client.get("/api/stats/top-books?limit=0").status_code == 400
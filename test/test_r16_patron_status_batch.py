@@ -0,0 +1,67 @@
+import importlib
+from datetime import datetime, timedelta
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+get_status = getattr(lib, "get_patron_status_report")
+get_statuses = getattr(lib, "get_patron_status_reports")
+
+def _seed_loans():
+    for i in range(1, 5):
+        add_book(f"Batch {i}", "Auth", f"800000000000{i}", 5)
+    now = datetime.now()
+    # (patron, book, days since borrowed, days overdue, returned)
+    for patron, book, borrowed, overdue, returned in [
+        ("111111", 1, 40, 26, False),   # capped fee
+        ("111111", 2, 20, 6, False),
+        ("111111", 3, 60, 46, True),
+        ("222222", 1, 3, -11, False),   # not yet due
+        ("222222", 4, 25, 11, False),
+        ("333333", 2, 30, 16, True),
+    ]:
+        db.insert_borrow_record(patron, book, now - timedelta(days=borrowed),
+                                now - timedelta(days=overdue))
+        if returned:
+            db.update_borrow_record_return_date(patron, book, now)
+
+@pytest.mark.usefixtures("temp_db")
+def test_r16_batch_matches_single_patron_reports():
+    """
+    Batched status: every report equals the single-patron report, including fees.
+    """
+    _seed_loans()
+    patrons = ["111111", "222222", "333333", "999999"]
+    reports = get_statuses(patrons, include_history=True)
+    assert list(reports) == patrons
+    for patron in patrons:
+        assert reports[patron] == get_status(patron)
+    assert reports["111111"]["total_late_fees"] == 18.0
+
+@pytest.mark.usefixtures("temp_db")
+def test_r16_history_is_optional_and_paged():
+    """
+    Batched status: history is omitted by default and can be paged per patron.
+    """
+    _seed_loans()
+    assert "history" not in get_statuses(["111111"])["111111"]
+
+    full = get_status("111111")["history"]
+    page = get_statuses(["111111", "333333"], include_history=True,
+                        history_limit=1, history_offset=1)
+    assert page["111111"]["history"] == full[1:2]
+    assert page["333333"]["history"] == []
+
+@pytest.mark.usefixtures("temp_db")
+def test_r16_batch_status_api(client):
+    """
+    Batched status (API): POST /api/patrons/status returns one report per patron.
+    """
+    data = client.post("/api/patrons/status",
+                       json={"patron_ids": ["123456", "654321"]}).get_json()
+    assert data["count"] == 2
+    assert data["reports"]["123456"]["borrowed_books"] == [3]
+    assert client.post("/api/patrons/status", json={"patron_ids": [1]}).status_code == 400
+    assert client.post("/api/patrons/status",
+                       json={"patron_ids": [], "history_offset": -1}).status_code == 400
@@ -0,0 +1,88 @@
+import importlib
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+snap = importlib.import_module("catalog_snapshot")
+add_book = getattr(lib, "add_book_to_catalog")
+borrow = getattr(lib, "borrow_book_by_patron")
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    yield str(tmp_path / "catalog.snapshot")
+    snap.unload_snapshot()
+
+@pytest.mark.usefixtures("temp_db")
+def test_r17_snapshot_round_trips_catalog(snapshot_path):
+    """
+    Snapshot: the mapped file yields the same books, in the same order, as SQLite.
+    """
+    add_book("Zebra Tales", "Ünïcode Author", "9000000000001", 2)
+    add_book("Apple Stories", "Auth", "9000000000002", 1)
+    add_book("Middle", "Auth", "9000000000003", 4)
+    assert snap.build_snapshot(snapshot_path) == 3
+
+    snapshot = snap.load_snapshot(snapshot_path)
+    assert len(snapshot) == 3
+    assert snapshot.books() == db.get_all_books()
+    assert snapshot.get_book_by_id(1)["author"] == "Ünïcode Author"
+    assert snapshot.get_book_by_id(42) is None
+    assert snapshot.is_current()
+
+@pytest.mark.usefixtures("temp_db")
+def test_r17_stale_snapshot_falls_back_to_sqlite(snapshot_path):
+    """
+    Snapshot: after a catalog change the snapshot is stale and reads go to SQLite.
+    """
+    add_book("Snapshotted", "Auth", "9000000000004", 1)
+    snap.build_snapshot(snapshot_path)
+    snapshot = snap.load_snapshot(snapshot_path)
+    assert snap.get_catalog_books()[0]["available_copies"] == 1
+
+    borrow("123456", 1)
+    assert not snapshot.is_current()
+    assert snap.get_catalog_books()[0]["available_copies"] == 0
+
+def test_r17_invalid_file_is_ignored(snapshot_path):
+    """
+    Snapshot: a missing or foreign file is not loaded.
+    """
+    assert snap.load_snapshot(snapshot_path) is None
+    with open(snapshot_path, "wb") as f:
+        f.write(b"not a snapshot" * 4)
+    assert snap.load_snapshot(snapshot_path) is None
+
+@pytest.mark.usefixtures("temp_db")
+def test_r17_empty_snapshot_is_closed_on_unload(snapshot_path):
+    """
+    Snapshot: an empty catalog's snapshot is still served and unmapped on unload.
+    """
+    assert snap.build_snapshot(snapshot_path) == 0
+    snapshot = snap.load_snapshot(snapshot_path)
+    assert len(snapshot) == 0 and snap.get_catalog_books() == []
+    snap.unload_snapshot()
+    assert snapshot._mm.closed
+
+@pytest.mark.usefixtures("temp_db")
+def test_r17_read_replica_warms_from_current_snapshot(snapshot_path, monkeypatch):
+    """
+    Snapshot: a current snapshot seeds the read replica without scanning books; a stale one does not.
+    """
+    add_book("Warm Start", "Auth", "9000000000005", 1)
+    snap.build_snapshot(snapshot_path)
+    snapshot = snap.load_snapshot(snapshot_path)
+    scans = []
+    real_scan = db.get_catalog_with_version
+    monkeypatch.setattr(db, "get_catalog_with_version", lambda: scans.append(1) or real_scan())
+    try:
+        db.enable_read_replica(3600, snapshot)
+        assert scans == []
+        assert [b["title"] for b in db.get_all_books()] == ["Warm Start"]
+        assert db.get_replica_metrics()["catalog_version"] == snapshot.version
+
+        borrow("123456", 1)
+        db.enable_read_replica(3600, snapshot)
+        assert scans == [1]
+        assert db.get_all_books()[0]["available_copies"] == 0
+    finally:
+        db.disable_read_replica()
@@ -0,0 +1,78 @@
+import importlib
+import threading
+import time
+import pytest
+
+admission = importlib.import_module("admission")
+
+def test_r18_priority_class_queues_then_sheds():
+    """
+    Admission: a full class queues up to max_queue for max_wait, then sheds.
+    """
+    cls = admission.PriorityClass("browse", limit=1, max_queue=1, max_wait=0.05)
+    assert cls.acquire()
+    assert not cls.acquire(), "queued request times out"
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(cls.acquire()))
+    cls.max_wait = 5
+    waiter.start()
+    while cls.metrics()["waiting"] == 0:
+        time.sleep(0.001)
+    assert not cls.acquire(), "queue is full, shed immediately"
+    cls.release()
+    waiter.join()
+    assert results == [True]
+
+    metrics = cls.metrics()
+    assert (metrics["admitted"], metrics["shed"], metrics["active"]) == (2, 2, 1)
+    assert metrics["max_queue_wait_seconds"] > 0
+
+@pytest.mark.usefixtures("temp_db")
+def test_r18_browsing_is_shed_while_circulation_is_admitted(client):
+    """
+    Admission (app): overloaded browsing gets 503 + Retry-After; borrowing still works.
+    """
+    controller = client.application.extensions["admission"]
+    browse = controller.classes["browse"]
+    browse.limit, browse.max_queue = 0, 0
+
+    resp = client.get("/catalog")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(admission.RETRY_AFTER_SECONDS)
+
+    resp = client.post("/borrow", data={"patron_id": "123456", "book_id": "1"})
+    assert resp.status_code == 302
+
+    metrics = client.get("/api/metrics").get_json()["admission"]
+    assert metrics["browse"]["shed"] == 1
+    assert metrics["circulation"]["admitted"] == 1
+    assert metrics["circulation"]["active"] == 0
+
+@pytest.mark.usefixtures("temp_db")
+def test_r18_change_feed_has_its_own_capped_class(client, monkeypatch):
+    """
+    Admission (app): change-feed requests hold a "changes" slot and are shed at once when full.
+    """
+    controller = client.application.extensions["admission"]
+    changes = controller.classes["changes"]
+
+    # Record the slot count from inside the stream, after the view has returned
+    api_routes = importlib.import_module("routes.api_routes")
+    seen = []
+    monkeypatch.setattr(api_routes, "SSE_STREAM_SECONDS", 0.2)
+    monkeypatch.setattr(api_routes.dispatcher, "wait_for_changes",
+                        lambda since, timeout: seen.append(changes.metrics()["active"]) or [])
+    assert client.get("/api/changes/stream").data.startswith(b": keep-alive")
+    assert seen and set(seen) == {1}, "SSE holds its slot while streaming"
+    # The test client keeps the last request's context until the next request
+    admission_metrics = client.get("/api/metrics").get_json()["admission"]
+    assert admission_metrics["changes"]["active"] == 0, "and gives it back when the stream ends"
+
+    changes.limit = 0
+    started = time.monotonic()
+    assert client.get("/api/changes?since=0&wait=5").status_code == 503
+    assert client.get("/api/changes/stream").status_code == 503
+    assert time.monotonic() - started < 1
+    assert client.get("/api/metrics").status_code == 200
+    assert controller.classes["api"].metrics()["admitted"] == 0
@@ -0,0 +1,51 @@
+import importlib
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+borrow = getattr(lib, "borrow_book_by_patron")
+bulk = getattr(lib, "get_availability_for_books")
+
+@pytest.mark.usefixtures("temp_db")
+def test_r8_bulk_lookup_by_id_and_isbn():
+    """
+    Bulk availability: IDs and ISBNs resolve to the same rows, misses are reported.
+    """
+    add_book("Bulk One", "Auth", "1000000000001", 2)
+    add_book("Bulk Two", "Auth", "1000000000002", 1)
+    borrow("123456", 1)
+
+    ok, data = bulk([1, 999], ["1000000000002", "0000000000000"])
+    assert ok
+    assert data["count"] == 2
+    assert data["results"][0] == {
+        "id": 1, "isbn": "1000000000001", "title": "Bulk One",
+        "total_copies": 2, "available_copies": 1,
+    }
+    assert data["not_found"] == {"book_ids": [999], "isbns": ["0000000000000"]}
+
+@pytest.mark.usefixtures("temp_db")
+def test_r8_bulk_lookup_chunks_past_variable_limit():
+    """
+    Bulk availability: more IDs than SQLite allows per statement still resolve.
+    """
+    add_book("Chunked", "Auth", "1000000000003", 1)
+    ids = list(range(1, db.SQLITE_MAX_VARIABLES * 3))
+    ok, data = bulk(ids, [])
+    assert ok and data["count"] == 1
+    assert len(data["not_found"]["book_ids"]) == len(ids) - 1
+
+@pytest.mark.usefixtures("temp_db")
+def test_r8_bulk_availability_api(client):
+    """
+    Bulk availability (API): POST /api/availability returns JSON results, 400 on bad input.
+    """
+    add_book("Api Bulk", "Auth", "1000000000004", 3)
+    resp = client.post("/api/availability", json={"isbns": ["1000000000004"]})
+    assert resp.status_code == 200
+    assert resp.get_json()["results"][0]["available_copies"] == 3
+
+    assert client.post("/api/availability", json={"book_ids": ["x"]}).status_code == 400
+    assert client.post("/api/availability", json={"book_ids": [2 ** 70]}).status_code == 400
+    assert client.post("/api/availability", data="nope").status_code == 400
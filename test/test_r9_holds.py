@@ -0,0 +1,84 @@
+import importlib
+import pytest
+
+db = importlib.import_module("database")
+lib = importlib.import_module("library_service")
+add_book = getattr(lib, "add_book_to_catalog")
+borrow = getattr(lib, "borrow_book_by_patron")
+ret = getattr(lib, "return_book_by_patron")
+place_hold = getattr(lib, "place_hold_on_book")
+cancel_hold = getattr(lib, "cancel_hold_for_patron")
+hold_report = getattr(lib, "get_patron_hold_report")
+
+@pytest.mark.usefixtures("temp_db")
+def test_r9_return_allocates_copy_to_queue_head():
+    """
+    Holds: a returned copy goes to the first patron in the queue, not back to the shelf.
+    """
+    add_book("Held Book", "Auth", "2000000000001", 1)
+    assert borrow("111111", 1)[0]
+
+    ok, _ = place_hold("111111", 1)
+    assert not ok, "cannot hold a book you already have on loan"
+    assert place_hold("222222", 1)[1].endswith("number 1 in the queue.")
+    ok, msg = place_hold("333333", 1)
+    assert ok and msg.endswith("number 2 in the queue.")
+    assert not place_hold("222222", 1)[0], "duplicate hold must be rejected"
+    assert hold_report("333333")["holds"][0]["queue_position"] == 2
+
+    ok_r, _ = ret("111111", 1)
+    assert ok_r
+    assert db.get_book_by_id(1)["available_copies"] == 0
+    assert hold_report("222222")["ready"] == [1]
+    assert hold_report("333333")["holds"][0]["queue_position"] == 1
+
+    assert not borrow("333333", 1)[0], "copy is reserved for the queue head"
+    assert borrow("222222", 1)[0]
+    assert hold_report("222222")["count"] == 0
+
+@pytest.mark.usefixtures("temp_db")
+def test_r9_cancel_ready_hold_passes_copy_on():
+    """
+    Holds: cancelling a ready hold hands the copy to the next hold, or back to the shelf.
+    """
+    add_book("Cancel Book", "Auth", "2000000000002", 1)
+    borrow("111111", 1)
+    place_hold("222222", 1)
+    place_hold("333333", 1)
+    ret("111111", 1)
+
+    hold_id = hold_report("222222")["holds"][0]["id"]
+    assert cancel_hold("222222", hold_id)[0]
+    assert hold_report("333333")["ready"] == [1]
+
+    hold_id = hold_report("333333")["holds"][0]["id"]
+    assert not cancel_hold("222222", hold_id)[0], "patrons cannot cancel others' holds"
+    assert cancel_hold("333333", hold_id)[0]
+    assert db.get_book_by_id(1)["available_copies"] == 1
+    assert db.get_hold_queue_length(1) == 0
+
+@pytest.mark.usefixtures("temp_db")
+def test_r9_return_without_loan_does_not_restock():
+    """
+    Holds: returning a book that is not on loan must not invent a copy.
+    """
+    add_book("No Loan", "Auth", "2000000000003", 1)
+    ok, _ = ret("444444", 1)
+    assert ok is False
+    assert db.get_book_by_id(1)["available_copies"] == 1
+
+@pytest.mark.usefixtures("temp_db")
+def test_r9_holds_api(client):
+    """
+    Holds (API): place, list, queue length and cancel.
+    """
+    resp = client.post("/api/holds", json={"patron_id": "222222", "book_id": 3})
+    assert resp.status_code == 201
+    assert client.get("/api/books/3/holds").get_json()["waiting"] == 1
+
+    holds = client.get("/api/holds/222222").get_json()["holds"]
+    assert holds[0]["queue_position"] == 1
+    resp = client.delete(f"/api/holds/{holds[0]['id']}?patron_id=222222")
+    assert resp.status_code == 200
+    assert client.post("/api/holds", json={"patron_id": "222222", "book_id": 1}).status_code == 400
+    assert client.post("/api/holds", json={"patron_id": "222222", "book_id": 2 ** 70}).status_code == 400